@@ -10,16 +10,39 @@ https://chatgpt.com/c/68569ce9-f6d4-8009-aaa3-d0449cff32dc
 
 import requests
 from bs4 import BeautifulSoup
-import csv
 import json
 import time
 import argparse
+import itertools
 import sys
 from urllib.parse import urljoin, urlparse
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from datetime import datetime
+from extractor import DEFAULT_CONFIG, resolve_parser, make_soup, extract_page, extract_result, extract_selected_text
+from http_cache import ResponseCache
+from crawler import Crawler
+from pipeline import ScrapePipeline
+from instrumentation import Instrumentation, MetricsAggregator, reset_connect_time, connect_time
+from session_pool import create_session
+from dedup import Deduplicator
+from schema import compile_schema, load_schema
+from robots import RobotsCache
+from sitemap import iter_sitemap_urls, find_sitemaps, is_sitemap_url
+from incremental import ScrapeState, GONE_STATUSES
+from sinks import ResultSink, JSONSink, JSONLinesSink, CSVSink
+from result_db import SQLiteSink, ResultDatabase
+from compact import CompactResults
+from work_queue import open_queue
+import threading
+import random
 import re
 import os
-from datetime import datetime
+import sqlite3
+import socket
+import multiprocessing
+from email.utils import parsedate_to_datetime
 
 #from selenium import webdriver
 #from selenium.webdriver.chrome.options import Options
@@ -27,23 +50,167 @@ from datetime import datetime
 # Then use:
 #options = webdriver.ChromeOptions()  # Instead of just Options()
 
+# Responses worth retrying; 429 and 503 may say when via Retry-After
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+# Content types treated as HTML pages (a missing Content-Type is allowed too)
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+
+class FetchError(Exception):
+    """A fetch rejected by the scraper itself, e.g. a body over max_bytes"""
+    
+    def __init__(self, kind: str, message: str):
+        super().__init__(message)
+        self.kind = kind
+
+
+def failure_type(error: Exception) -> str:
+    """Classify a fetch exception into the failure types recorded by WebScraper"""
+    if isinstance(error, FetchError):
+        return error.kind
+    if isinstance(error, requests.exceptions.Timeout):
+        return 'timeout'
+    if isinstance(error, requests.exceptions.HTTPError):
+        return 'http_error'
+    if isinstance(error, requests.exceptions.TooManyRedirects):
+        return 'too_many_redirects'
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError)):
+        return 'connection'
+    return 'request_error'
+
+
+def parse_retry_after(value: str) -> float:
+    """Seconds to wait according to a Retry-After header, or None if absent/invalid"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostRateLimiter:
+    """Spaces out requests to the same host by a minimum delay"""
+    
+    def __init__(self, delay: float):
+        """
+        Initialize the rate limiter
+        
+        Args:
+            delay: Minimum time in seconds between two requests to one host
+        """
+        self.delay = delay
+        self._host_delays = {}
+        self._next_allowed = {}
+        self._lock = threading.Lock()
+    
+    def set_host_delay(self, url: str, delay: float):
+        """Use a longer delay for the host of url, e.g. a robots.txt Crawl-delay"""
+        self._host_delays[urlparse(url).netloc.lower()] = delay
+    
+    def wait(self, url: str):
+        """Block until a request to the host of url is allowed"""
+        if self.delay <= 0 and not self._host_delays:
+            return
+        
+        host = urlparse(url).netloc.lower()
+        delay = max(self.delay, self._host_delays.get(host, 0))
+        if delay <= 0:
+            return
+        
+        # Reserve the next slot for this host, then sleep outside the lock
+        # so requests to other hosts are not held up
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_allowed.get(host, now))
+            self._next_allowed[host] = start + delay
+        
+        wait_time = start - time.monotonic()
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
 class WebScraper:
     """A flexible web scraper class for extracting data from websites"""
     
-    def __init__(self, delay: float = 1.0, timeout: int = 10):
+    def __init__(self, delay: float = 1.0, timeout: int = 10, concurrency: int = 1,
+                 parser: str = 'html.parser', strain: bool = False, cache: ResponseCache = None,
+                 parse_workers: int = 0, instrumentation: Instrumentation = None,
+                 max_bytes: int = 10 * 1024 * 1024, html_only: bool = True, retries: int = 2,
+                 backoff: float = 0.5, max_backoff: float = 60.0, pool_connections: int = 10,
+                 pool_maxsize: int = None, session: requests.Session = None, dedup: Deduplicator = None,
+                 robots: RobotsCache = None, state: ScrapeState = None):
         """
         Initialize the web scraper
         
         Args:
-            delay: Delay between requests in seconds (be respectful!)
+            delay: Delay between requests to the same host in seconds (be respectful!)
             timeout: Request timeout in seconds
+            concurrency: Maximum number of pages fetched at the same time
+            parser: BeautifulSoup tree builder ('html.parser', 'lxml' or 'auto')
+            strain: Only build the parts of the tree that scrape_page's config needs
+            cache: Optional on-disk response cache used by fetch()
+            parse_workers: Parse pages in this many processes (0 = parse in the fetching thread)
+            instrumentation: Receives per-stage timing events from fetch() and scrape_page()
+            max_bytes: Abort downloads whose body exceeds this many bytes (0 = no limit)
+            html_only: Abort downloads whose Content-Type is not HTML
+            retries: Extra attempts after a timeout, connection error or 429/5xx response
+            backoff: Base delay in seconds of the exponential backoff between attempts
+            max_backoff: Upper bound in seconds for one backoff or Retry-After wait
+            pool_connections: Number of hosts whose connection pools are kept
+            pool_maxsize: Connections kept per host (default: max(10, concurrency))
+            session: Shared session to use instead of creating one (e.g. from a SessionPool);
+                pool_connections and pool_maxsize are then ignored
+            dedup: Marks or drops near-duplicate pages in iter_scrape() and crawls
+            robots: If given, fetch() skips URLs disallowed by robots.txt and honours Crawl-delay
+            state: Incremental mode; pages whose body is unchanged since the last run
+                reuse the stored result instead of being parsed again
         """
         self.delay = delay
         self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.concurrency = max(1, int(concurrency))
+        self.parser = parser
+        self.strain = strain
+        self.cache = cache
+        self.parse_workers = max(0, int(parse_workers))
+        self.instrumentation = instrumentation
+        self.max_bytes = max_bytes
+        self.html_only = html_only
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.dedup = dedup
+        self.robots = robots
+        self.state = state
+        self.failures = []
+        self._failures_lock = threading.Lock()
+        self.rate_limiter = HostRateLimiter(delay)
+        
+        # Keep enough pooled connections per host for every worker thread
+        self.session = session or create_session(pool_connections=pool_connections,
+                                                 pool_maxsize=pool_maxsize or max(10, self.concurrency))
+    
+    def failure_counts(self) -> Dict[str, int]:
+        """Number of failed fetches per failure type"""
+        counts = {}
+        with self._failures_lock:
+            for failure in self.failures:
+                counts[failure['type']] = counts.get(failure['type'], 0) + 1
+        return counts
+    
+    @property
+    def cache_hits(self) -> int:
+        """Number of fetches answered from the response cache (including 304s)"""
+        return self.cache.hits if self.cache else 0
+    
+    @property
+    def cache_misses(self) -> int:
+        """Number of fetches that had to download the full body"""
+        return self.cache.misses if self.cache else 0
         
     def get_page(self, url: str) -> BeautifulSoup:
         """
@@ -55,19 +222,187 @@ class WebScraper:
         Returns:
             BeautifulSoup object of the parsed HTML
         """
+        content = self.fetch(url)
+        if content is None:
+            return None
+        return self.parse(content)
+    
+    def fetch(self, url: str) -> bytes:
+        """
+        Download the raw body of a web page
+        
+        Args:
+            url: URL to fetch
+            
+        Returns:
+            Response body, or None if the request failed
+        """
+        # Timing is only measured while someone is listening
+        hooks = self.instrumentation if self.instrumentation is not None and self.instrumentation.enabled else None
+        
         try:
-            print(f"Fetching: {url}")
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
+            # Parsed once up front; malformed URLs such as http://[abc/x are skipped like any failed fetch
+            host = urlparse(url).netloc
+        except ValueError as e:
+            return self._fail(url, FetchError('invalid_url', f"Invalid URL: {e}"), hooks)
+        
+        if self.robots:
+            allowed, crawl_delay = self.robots.check(url, self.session, self.timeout)
+            if not allowed:
+                return self._fail(url, FetchError('robots', 'Disallowed by robots.txt'), hooks, host)
+            if crawl_delay:
+                self.rate_limiter.set_host_delay(url, crawl_delay)
+        
+        entry = self.cache.get(url) if self.cache else None
+        if entry and entry.is_fresh(self.cache.ttl):
+            self.cache.record('hit')
+            if hooks:
+                hooks.emit({'event': 'fetch', 'url': url, 'host': host, 'cache': 'hit',
+                            'bytes': 0, 'durations': {}})
+            return entry.body
+        
+        if hooks:
+            start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                # Wait for this host's delay to pass to be respectful
+                self.rate_limiter.wait(url)
+                
+                print(f"Fetching: {url}")
+                headers = entry.conditional_headers() if entry else None
+                if hooks:
+                    requested = time.perf_counter()
+                    reset_connect_time()
+                response = self.session.get(url, timeout=self.timeout, headers=headers, stream=True)
+                
+                try:
+                    if hooks:
+                        first_byte = time.perf_counter()
+                    
+                    if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                        attempt += 1
+                        self._wait_before_retry(url, attempt, response)
+                        continue
+                    
+                    if response.status_code == 304 and entry:
+                        self.cache.refresh(url, response.headers)
+                        self.cache.record('revalidated')
+                        content = entry.body
+                        cache_result = 'revalidated'
+                    else:
+                        response.raise_for_status()
+                        content = self._read_body(response)
+                        cache_result = None
+                        if self.cache:
+                            self.cache.store(url, content, response.headers)
+                            self.cache.record('miss')
+                            cache_result = 'miss'
+                    
+                    if hooks:
+                        connect = connect_time()
+                        hooks.emit({
+                            'event': 'fetch',
+                            'url': url,
+                            'host': host,
+                            'status': response.status_code,
+                            'bytes': len(content) if cache_result != 'revalidated' else 0,
+                            'cache': cache_result,
+                            'durations': {
+                                'wait': requested - start,
+                                'connect': connect,
+                                'ttfb': first_byte - requested - connect,
+                                'download': time.perf_counter() - first_byte
+                            }
+                        })
+                    
+                    return content
+                finally:
+                    response.close()
             
-            # Add delay to be respectful
-            time.sleep(self.delay)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                if attempt < self.retries:
+                    attempt += 1
+                    self._wait_before_retry(url, attempt)
+                    continue
+                return self._fail(url, e, hooks, host)
             
-            return BeautifulSoup(response.content, 'html.parser')
+            except (requests.exceptions.RequestException, FetchError) as e:
+                return self._fail(url, e, hooks, host)
+    
+    def _read_body(self, response: requests.Response) -> bytes:
+        """Read a streamed response body, enforcing html_only and max_bytes"""
+        content_type = response.headers.get('Content-Type', '')
+        if self.html_only and content_type and not content_type.lower().startswith(HTML_CONTENT_TYPES):
+            raise FetchError('non_html', f"Skipping non-HTML content ({content_type})")
+        
+        declared = response.headers.get('Content-Length', '')
+        if self.max_bytes and declared.isdigit() and int(declared) > self.max_bytes:
+            raise FetchError('too_large', f"Body of {declared} bytes exceeds the {self.max_bytes} byte limit")
+        
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            size += len(chunk)
+            if self.max_bytes and size > self.max_bytes:
+                raise FetchError('too_large', f"Body exceeds the {self.max_bytes} byte limit")
+            chunks.append(chunk)
+        return b''.join(chunks)
+    
+    def _wait_before_retry(self, url: str, attempt: int, response: requests.Response = None):
+        """Sleep before retry number attempt, honouring Retry-After on 429/503"""
+        delay = None
+        if response is not None and response.status_code in (429, 503):
+            delay = parse_retry_after(response.headers.get('Retry-After'))
+        if delay is None:
+            # Exponential backoff with full jitter
+            delay = random.uniform(0, self.backoff * 2 ** (attempt - 1))
+        delay = min(delay, self.max_backoff)
+        
+        reason = f"HTTP {response.status_code}" if response is not None else "connection problem"
+        print(f"Retrying {url} in {delay:.1f}s ({reason}, attempt {attempt} of {self.retries})")
+        time.sleep(delay)
+    
+    def record_parse_error(self, url: str, error: Exception) -> None:
+        """Record a page whose body could not be parsed or extracted and return None"""
+        return self._fail(url, FetchError('parse_error', str(error)))
+    
+    def _fail(self, url: str, error: Exception, hooks: Instrumentation = None, host: str = '') -> None:
+        """Record a failed fetch by type and return None (host is only used for instrumentation)"""
+        kind = failure_type(error)
+        print(f"Error {'parsing' if kind == 'parse_error' else 'fetching'} {url}: {error}")
+        
+        response = getattr(error, 'response', None)
+        failure = {
+            'url': url,
+            'type': kind,
+            'status': response.status_code if response is not None else None,
+            'message': str(error),
+            'timestamp': datetime.now().isoformat()
+        }
+        with self._failures_lock:
+            self.failures.append(failure)
+        
+        if hooks:
+            event = {'event': 'error', 'url': url, 'host': host, 'error': kind}
+            if failure['status'] is not None:
+                event['status'] = failure['status']
+            hooks.emit(event)
+        return None
+    
+    def parse(self, content: bytes, config: Dict[str, Any] = None) -> BeautifulSoup:
+        """
+        Parse a page body, restricted to what config needs when strain is enabled
+        
+        Args:
+            content: Raw page body
+            config: Extraction config that will be applied to the tree
             
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching {url}: {e}")
-            return None
+        Returns:
+            BeautifulSoup object of the parsed HTML
+        """
+        return make_soup(content, config, parser=self.parser, strain=self.strain)
     
     def extract_links(self, soup: BeautifulSoup, base_url: str) -> List[str]:
         """Extract all links from a page"""
@@ -81,11 +416,9 @@ class WebScraper:
     def extract_text(self, soup: BeautifulSoup, selector: str = None) -> List[str]:
         """Extract text content from elements"""
         if selector:
-            elements = soup.select(selector)
-        else:
-            elements = soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+            return extract_selected_text(soup, selector)
         
-        return [elem.get_text(strip=True) for elem in elements if elem.get_text(strip=True)]
+        return extract_page(soup, '', {'extract_text': True})['text']
     
     def extract_images(self, soup: BeautifulSoup, base_url: str) -> List[Dict[str, str]]:
         """Extract image information"""
@@ -127,54 +460,109 @@ class WebScraper:
         
         Args:
             url: URL to scrape
-            config: Configuration dict specifying what to extract
+            config: Configuration dict specifying what to extract; a 'schema'
+                entry (see schema.py) adds the extracted 'fields'
             
         Returns:
-            Dictionary containing extracted data
+            Dictionary containing extracted data; in incremental mode (see
+            state) it also has a 'change' of 'new', 'changed' or 'unchanged'
         """
         if config is None:
-            config = {
-                'extract_links': True,
-                'extract_text': True,
-                'extract_images': True,
-                'extract_tables': True,
-                'text_selector': None
-            }
-        
-        soup = self.get_page(url)
-        if not soup:
+            config = DEFAULT_CONFIG
+        
+        content = self.fetch(url)
+        if content is None:
             return None
         
-        data = {
-            'url': url,
-            'title': soup.title.string if soup.title else '',
-            'timestamp': datetime.now().isoformat()
-        }
+        if self.state:
+            digest = self.state.digest(content, config)
+            previous = self.state.unchanged(url, digest)
+            if previous is not None:
+                return previous
         
-        if config.get('extract_links'):
-            data['links'] = self.extract_links(soup, url)
+        try:
+            if self.instrumentation is None or not self.instrumentation.enabled:
+                data = extract_result(url, content, config, parser=self.parser, strain=self.strain)
+            else:
+                timings = {}
+                data = extract_result(url, content, config, parser=self.parser, strain=self.strain, timings=timings)
+                self.instrumentation.emit({'event': 'scrape', 'url': url, 'host': urlparse(url).netloc,
+                                           'bytes': len(content), 'durations': timings})
+        except Exception as e:
+            # Recorded like the parse failures of a ScrapePipeline
+            return self.record_parse_error(url, e)
+        
+        return self.state.record(url, digest, data) if self.state else data
+    
+    def iter_scrape(self, urls: Iterable[str], config: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Scrape multiple pages lazily, yielding each result as soon as it is ready
         
-        if config.get('extract_text'):
-            data['text'] = self.extract_text(soup, config.get('text_selector'))
+        Results come out in the same order as urls. With concurrency > 1 at
+        most 2 x concurrency pages are in flight or waiting to be consumed, so
+        memory does not grow with the length of urls. With parse_workers > 0
+        pages go through a ScrapePipeline that parses them in a process pool.
+        With a Deduplicator attached, near-duplicate pages are marked or dropped.
         
-        if config.get('extract_images'):
-            data['images'] = self.extract_images(soup, url)
+        Args:
+            urls: URLs to scrape, may be any iterable including a generator
+            config: Configuration dict passed to scrape_page
+            
+        Yields:
+            Result dicts of the pages that were scraped successfully
+        """
+        results = self._iter_results(urls, config)
+        if self.dedup is None:
+            yield from results
+            return
+        try:
+            for result in results:
+                result = self.dedup.check(result)
+                if result:
+                    yield result
+        finally:
+            results.close()
+    
+    def _iter_results(self, urls: Iterable[str], config: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Scrape pages in order, without deduplication"""
+        if self.parse_workers > 0:
+            yield from ScrapePipeline(self, workers=self.parse_workers).run(urls, config)
+            return
         
-        if config.get('extract_tables'):
-            data['tables'] = self.extract_table_data(soup)
+        if self.concurrency <= 1:
+            for url in urls:
+                result = self.scrape_page(url, config)
+                if result:
+                    yield result
+            return
         
-        return data
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = deque()
+            try:
+                for url in urls:
+                    pending.append(executor.submit(self.scrape_page, url, config))
+                    if len(pending) >= self.concurrency * 2:
+                        result = pending.popleft().result()
+                        if result:
+                            yield result
+                while pending:
+                    result = pending.popleft().result()
+                    if result:
+                        yield result
+            finally:
+                # Stop queued work if the consumer stops early
+                for future in pending:
+                    future.cancel()
     
     def scrape_multiple_pages(self, urls: List[str], config: Dict[str, Any] = None) -> List[Dict[str, Any]]:
-        """Scrape multiple pages"""
-        results = []
-        
-        for url in urls:
-            result = self.scrape_page(url, config)
-            if result:
-                results.append(result)
+        """
+        Scrape multiple pages
         
-        return results
+        With concurrency > 1 the pages are fetched by a thread pool. Results
+        are always returned in the same order as urls. Use iter_scrape() to
+        process results one at a time instead of collecting them all.
+        """
+        return list(self.iter_scrape(urls, config))
     
     def save_to_csv(self, data: List[Dict[str, Any]], filename: str):
         """Save scraped data to CSV file"""
@@ -182,26 +570,9 @@ class WebScraper:
             print("No data to save")
             return
         
-        # Flatten the data for CSV
-        flattened_data = []
-        for item in data:
-            flat_item = {
-                'url': item['url'],
-                'title': item['title'],
-                'timestamp': item['timestamp'],
-                'num_links': len(item.get('links', [])),
-                'num_images': len(item.get('images', [])),
-                'num_tables': len(item.get('tables', [])),
-                'text_preview': ' '.join(item.get('text', []))[:200] + '...' if item.get('text') else ''
-            }
-            flattened_data.append(flat_item)
-        
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            if flattened_data:
-                fieldnames = flattened_data[0].keys()
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(flattened_data)
+        with CSVSink(filename) as sink:
+            for item in data:
+                sink.write(item)
         
         print(f"Data saved to {filename}")
     
@@ -213,58 +584,578 @@ class WebScraper:
         print(f"Data saved to {filename}")
 
 
-def main():
-    """Main function for command line interface"""
-    parser = argparse.ArgumentParser(description='Web Scraper App')
-    parser.add_argument('urls', nargs='+', help='URLs to scrape')
+def add_scraper_arguments(parser: argparse.ArgumentParser):
+    """Add the fetch and extraction options shared by all CLI commands"""
     parser.add_argument('--delay', type=float, default=1.0, help='Delay between requests (seconds)')
     parser.add_argument('--timeout', type=int, default=10, help='Request timeout (seconds)')
+    parser.add_argument('--concurrency', type=int, default=1, help='Number of pages to fetch at the same time')
     parser.add_argument('--output', '-o', default='scraped_data', help='Output filename (without extension)')
-    parser.add_argument('--format', choices=['json', 'csv', 'both'], default='both', help='Output format')
+    parser.add_argument('--format', choices=['json', 'jsonl', 'csv', 'sqlite', 'both'], default='both',
+                        help='Output format (both = json and csv, sqlite = searchable database)')
+    parser.add_argument('--append', action='store_true', help='Append to existing jsonl/csv/sqlite output')
     parser.add_argument('--text-selector', help='CSS selector for text extraction')
+    parser.add_argument('--schema', help='JSON or YAML file mapping field names to CSS selectors')
     parser.add_argument('--no-links', action='store_true', help='Skip link extraction')
     parser.add_argument('--no-images', action='store_true', help='Skip image extraction')
     parser.add_argument('--no-tables', action='store_true', help='Skip table extraction')
     parser.add_argument('--no-text', action='store_true', help='Skip text extraction')
-    
-    args = parser.parse_args()
-    
-    # Create scraper instance
-    scraper = WebScraper(delay=args.delay, timeout=args.timeout)
-    
-    # Configure extraction
-    config = {
+    parser.add_argument('--parser', choices=['html.parser', 'lxml', 'auto'], default='html.parser',
+                        help='HTML parser backend (auto uses lxml when installed)')
+    parser.add_argument('--strain', action='store_true',
+                        help='Only parse the tags needed for the enabled extractions')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='Parse pages in this many processes (0 = parse in the fetch threads)')
+    parser.add_argument('--max-bytes', type=float, default=10,
+                        help='Skip pages whose body is larger than this (MB, 0 = no limit)')
+    parser.add_argument('--allow-non-html', action='store_true', help='Also download non-HTML content types')
+    parser.add_argument('--retries', type=int, default=2, help='Retries after timeouts, connection errors and 429/5xx')
+    parser.add_argument('--backoff', type=float, default=0.5, help='Base delay of the exponential retry backoff (seconds)')
+    parser.add_argument('--pool-connections', type=int, default=10, help='Number of hosts to keep connection pools for')
+    parser.add_argument('--pool-maxsize', type=int, help='Connections kept per host (default: max(10, concurrency))')
+    parser.add_argument('--timings', action='store_true', help='Report time spent per stage in the summary')
+    parser.add_argument('--cache', action='store_true', help='Cache responses on disk and revalidate them')
+    parser.add_argument('--cache-dir', default='.http_cache', help='Directory of the response cache')
+    parser.add_argument('--cache-size', type=float, default=100, help='Maximum response cache size (MB)')
+    parser.add_argument('--cache-ttl', type=float, default=0,
+                        help='Seconds a cached response is used without revalidation')
+    parser.add_argument('--dedup', choices=['mark', 'drop'],
+                        help='Mark or drop pages whose text nearly duplicates an earlier page')
+    parser.add_argument('--dedup-distance', type=int, default=6,
+                        help='Maximum differing SimHash bits (of 64) for a near-duplicate')
+    parser.add_argument('--dedup-store', help='SQLite file that keeps page fingerprints across runs')
+    parser.add_argument('--robots', action='store_true',
+                        help='Skip URLs disallowed by robots.txt and honour its Crawl-delay')
+    parser.add_argument('--robots-ttl', type=float, default=86400, help='Seconds a robots.txt is cached')
+    parser.add_argument('--incremental', metavar='STATE_FILE',
+                        help='Reuse results of unchanged pages from this state file and write a delta')
+    parser.add_argument('--snapshot', action='store_true',
+                        help='With --incremental, also write the full output next to the delta')
+
+
+def build_scraper(args: argparse.Namespace) -> WebScraper:
+    """Create a WebScraper from parsed command line options"""
+    if args.parser == 'lxml' and resolve_parser('auto') != 'lxml':
+        sys.exit("The lxml parser is not installed (pip install lxml); use --parser html.parser or auto")
+    cache = None
+    if args.cache:
+        cache = ResponseCache(args.cache_dir, max_size=int(args.cache_size * 1024 * 1024), ttl=args.cache_ttl)
+    instrumentation = None
+    if args.timings:
+        instrumentation = Instrumentation()
+        instrumentation.register(MetricsAggregator())
+    dedup = None
+    if args.dedup:
+        dedup = Deduplicator(max_distance=args.dedup_distance, drop=args.dedup == 'drop',
+                             store_path=args.dedup_store)
+    robots = RobotsCache(ttl=args.robots_ttl) if args.robots else None
+    state = ScrapeState(args.incremental) if args.incremental else None
+    return WebScraper(delay=args.delay, timeout=args.timeout, concurrency=args.concurrency,
+                      parser=args.parser, strain=args.strain, cache=cache, parse_workers=args.parse_workers,
+                      instrumentation=instrumentation, max_bytes=int(args.max_bytes * 1024 * 1024),
+                      html_only=not args.allow_non_html, retries=args.retries, backoff=args.backoff,
+                      pool_connections=args.pool_connections, pool_maxsize=args.pool_maxsize, dedup=dedup,
+                      robots=robots, state=state)
+
+
+def build_config(args: argparse.Namespace) -> Dict[str, Any]:
+    """Create the extraction config from parsed command line options"""
+    schema = None
+    if args.schema:
+        # Compiled once here, then applied to every page
+        try:
+            schema = compile_schema(load_schema(args.schema))
+        except (OSError, ValueError) as e:
+            sys.exit(f"Invalid schema {args.schema}: {e}")
+    return {
         'extract_links': not args.no_links,
         'extract_text': not args.no_text,
         'extract_images': not args.no_images,
         'extract_tables': not args.no_tables,
-        'text_selector': args.text_selector
+        'text_selector': args.text_selector,
+        'schema': schema
     }
+
+
+def open_sinks(args: argparse.Namespace) -> List[ResultSink]:
+    """Open a streaming sink for every output format selected on the command line"""
+    sinks = []
+    if args.format in ['json', 'both']:
+        if args.append:
+            print("--append is not supported for pretty JSON output, overwriting")
+        sinks.append(JSONSink(f"{args.output}.json"))
+    if args.format == 'jsonl':
+        sinks.append(JSONLinesSink(f"{args.output}.jsonl", append=args.append))
+    if args.format in ['csv', 'both']:
+        sinks.append(CSVSink(f"{args.output}.csv", append=args.append))
+    if args.format == 'sqlite':
+        sinks.append(SQLiteSink(f"{args.output}.sqlite3", append=args.append))
+    return sinks
+
+
+def run_to_sinks(scraper: WebScraper, results: Iterable[Dict[str, Any]], args: argparse.Namespace) -> Dict[str, int]:
+    """
+    Stream results into the selected output files and print the summary
     
-    # Scrape the URLs
-    print(f"Starting to scrape {len(args.urls)} URLs...")
-    results = scraper.scrape_multiple_pages(args.urls, config)
+    In incremental mode new and changed pages, followed by the removed
+    ones, go to <output>.delta.jsonl; the regular outputs are only written
+    with --snapshot. Failed URLs with their failure type are written to
+    <output>.failures.jsonl.
     
-    if not results:
+    Returns:
+        Summary counters of the run
+    """
+    summary = {'pages': 0, 'links': 0, 'images': 0}
+    incremental = scraper.state is not None
+    sinks = open_sinks(args) if not incremental or args.snapshot else []
+    delta = JSONLinesSink(f"{args.output}.delta.jsonl", append=args.append) if incremental else None
+    try:
+        for result in results:
+            for sink in sinks:
+                sink.write(result)
+            if delta and result.get('change') != 'unchanged':
+                delta.write(result)
+            summary['pages'] += 1
+            summary['links'] += len(result.get('links', []))
+            summary['images'] += len(result.get('images', []))
+        
+        if incremental:
+            # Pages that failed for other reasons than being gone are kept for the next run
+            retained = [f['url'] for f in scraper.failures if f.get('status') not in GONE_STATUSES]
+            for url in scraper.state.finish(retained):
+                delta.write({'url': url, 'change': 'removed'})
+    finally:
+        for sink in sinks:
+            sink.close()
+        if delta:
+            delta.close()
+            sinks.append(delta)
+    
+    if scraper.failures:
+        # Which URLs failed and why, next to the regular output
+        with JSONLinesSink(f"{args.output}.failures.jsonl", append=args.append) as failures:
+            for failure in scraper.failures:
+                failures.write(failure)
+        sinks.append(failures)
+    
+    if not summary['pages']:
         print("No data was scraped successfully")
+        print_failures(scraper)
+        if scraper.failures:
+            print(f"Failures saved to {args.output}.failures.jsonl")
+        return summary
+    
+    print(f"Successfully scraped {summary['pages']} pages")
+    for sink in sinks:
+        print(f"Data saved to {sink.filename}")
+    
+    print_summary(scraper, summary)
+    return summary
+
+
+def print_failures(scraper: WebScraper):
+    """Print the number of failed pages per failure type"""
+    failures = scraper.failure_counts()
+    if failures:
+        print(f"Failed pages: {sum(failures.values())} (" +
+              ', '.join(f"{kind}: {count}" for kind, count in sorted(failures.items())) + ")")
+
+
+def print_summary(scraper: WebScraper, summary: Dict[str, int]):
+    """Print the end-of-run statistics"""
+    print(f"\nScraping Summary:")
+    print(f"Pages scraped: {summary['pages']}")
+    print(f"Total links found: {summary['links']}")
+    print(f"Total images found: {summary['images']}")
+    print_failures(scraper)
+    if scraper.state:
+        counts = scraper.state.counts
+        print(f"Changes: {counts['new']} new, {counts['changed']} changed, "
+              f"{counts['unchanged']} unchanged, {counts['removed']} removed")
+    if scraper.dedup:
+        action = 'dropped' if scraper.dedup.drop else 'marked'
+        print(f"Near-duplicates {action}: {scraper.dedup.duplicates} of {scraper.dedup.checked} pages "
+              f"(dedup ratio {scraper.dedup.ratio:.1%})")
+    if scraper.cache:
+        print(f"Cache hits: {scraper.cache_hits}")
+        print(f"Cache misses: {scraper.cache_misses}")
+    if scraper.instrumentation:
+        for callback in scraper.instrumentation.callbacks:
+            if isinstance(callback, MetricsAggregator):
+                print("Time per stage:")
+                for stage, total in callback.summary().items():
+                    print(f"  {stage}: {total['seconds']:.3f}s total, {total['count']} calls")
+
+
+def crawl_main(argv: List[str]):
+    """Command line interface of the crawl subcommand"""
+    parser = argparse.ArgumentParser(prog='WebScraper.py crawl', description='Crawl a site starting from seed URLs')
+    parser.add_argument('seeds', nargs='*', help='Seed URLs (may be omitted when resuming)')
+    parser.add_argument('--max-depth', type=int, default=2, help='Maximum link depth from a seed')
+    parser.add_argument('--max-pages', type=int, default=100, help='Maximum number of pages to scrape successfully')
+    parser.add_argument('--allow-domain', action='append', default=[],
+                        help='Domain links may point to (repeatable, includes subdomains)')
+    parser.add_argument('--any-domain', action='store_true', help='Follow links to any domain')
+    parser.add_argument('--state', default='crawl_state.sqlite3',
+                        help='Crawl state file; rerun with the same file to resume')
+    add_scraper_arguments(parser)
+    
+    args = parser.parse_args(argv)
+    if args.incremental:
+        # A resumed or page-limited crawl does not revisit every known page,
+        # so the unvisited ones would wrongly be reported as removed
+        parser.error('--incremental is not supported by crawl')
+    
+    scraper = build_scraper(args)
+    crawler = Crawler(
+        scraper,
+        state_path=args.state,
+        max_depth=args.max_depth,
+        max_pages=args.max_pages,
+        same_domain=not args.any_domain,
+        allowed_domains=args.allow_domain,
+        config=build_config(args)
+    )
+    
+    added = crawler.add_seeds(args.seeds)
+    print(f"Starting crawl: {added} new seed URLs, {len(crawler.frontier)} URLs queued, "
+          f"{crawler.frontier.pages} pages already crawled")
+    
+    try:
+        run_to_sinks(scraper, crawler.crawl(), args)
+    finally:
+        crawler.close()
+
+
+def sitemap_main(argv: List[str]):
+    """Command line interface of the sitemap subcommand"""
+    parser = argparse.ArgumentParser(prog='WebScraper.py sitemap',
+                                     description='Scrape the pages listed in sitemaps')
+    parser.add_argument('sources', nargs='+',
+                        help='Sitemap URLs (.xml, .xml.gz, indexes) or site URLs whose robots.txt lists them')
+    parser.add_argument('--max-urls', type=int, help='Stop after this many sitemap URLs')
+    add_scraper_arguments(parser)
+    
+    args = parser.parse_args(argv)
+    
+    scraper = build_scraper(args)
+    sitemaps = []
+    for source in args.sources:
+        if is_sitemap_url(source):
+            sitemaps.append(source)
+        else:
+            sitemaps.extend(find_sitemaps(source, scraper.session, scraper.robots, scraper.timeout))
+    
+    # URLs are streamed from the sitemaps straight into the scraper
+    urls = iter_sitemap_urls(sitemaps, scraper.session, scraper.timeout, scraper.rate_limiter)
+    if args.max_urls is not None:
+        urls = itertools.islice(urls, args.max_urls)
+    
+    print(f"Scraping pages from {len(sitemaps)} sitemaps...")
+    run_to_sinks(scraper, scraper.iter_scrape(urls, build_config(args)), args)
+
+
+def query_main(argv: List[str]):
+    """Command line interface of the query subcommand"""
+    parser = argparse.ArgumentParser(prog='WebScraper.py query',
+                                     description='Search a database written with --format sqlite')
+    parser.add_argument('database', help='Database file, e.g. scraped_data.sqlite3')
+    parser.add_argument('terms', nargs='*', help='Full-text query (FTS5 syntax, e.g. price AND "free shipping")')
+    parser.add_argument('--links-to', metavar='URL', help='List the pages linking to URL')
+    parser.add_argument('--links-from', metavar='URL', help='List the links found on the page URL')
+    parser.add_argument('--limit', type=int, default=20, help='Results per page (at most 100)')
+    parser.add_argument('--offset', type=int, default=0, help='Number of results to skip')
+    
+    args = parser.parse_args(argv)
+    if sum(map(bool, (args.terms, args.links_to, args.links_from))) != 1:
+        parser.error('give either search terms, --links-to or --links-from')
+    
+    try:
+        db = ResultDatabase(args.database)
+    except (OSError, sqlite3.Error) as e:
+        sys.exit(f"Cannot open {args.database}: {e}")
+    try:
+        if args.links_to:
+            page = db.links_to(args.links_to, args.limit, args.offset)
+        elif args.links_from:
+            page = db.links_from(args.links_from, args.limit, args.offset)
+        else:
+            page = db.search(' '.join(args.terms), args.limit, args.offset)
+    except ValueError as e:
+        sys.exit(str(e))
+    finally:
+        db.close()
+    
+    for number, row in enumerate(page['results'], page['offset'] + 1):
+        if 'snippet' in row:
+            print(f"{number}. {row['title'] or '(no title)'} - {row['url']}")
+            print(f"   {row['snippet']}")
+        elif 'title' in row:
+            print(f"{number}. {row['title'] or '(no title)'} - {row['url']}")
+        else:
+            print(f"{number}. {row['url']}")
+    if not page['results']:
+        print("No results")
+    if page['next_offset'] is not None:
+        print(f"More results: --offset {page['next_offset']}")
+
+
+def worker_parser() -> argparse.ArgumentParser:
+    """Argument parser of the worker subcommand"""
+    parser = argparse.ArgumentParser(prog='WebScraper.py worker',
+                                     description='Scrape the URLs of a shared work queue with several processes')
+    parser.add_argument('queue', help='Queue file (SQLite) or backend spec such as sqlite:///data/queue.sqlite3')
+    parser.add_argument('urls', nargs='*', help='URLs to add to the queue before working')
+    parser.add_argument('--url-file', help='File with URLs to add to the queue, one per line')
+    parser.add_argument('--processes', type=int, default=4,
+                        help='Worker processes to start (0 = only enqueue and report progress)')
+    parser.add_argument('--shards', type=int, default=64, help='Host shards of a new queue')
+    parser.add_argument('--batch-size', type=int, default=50, help='URLs leased at a time')
+    parser.add_argument('--visibility-timeout', type=float, default=300,
+                        help='Seconds until the leases of a silent worker expire and its URLs are retried')
+    parser.add_argument('--max-attempts', type=int, default=3, help='Leases a URL gets before it is given up')
+    parser.add_argument('--retry-failed', action='store_true', help='Put failed URLs back in the queue')
+    parser.add_argument('--status', action='store_true', help='Print the queue progress and exit')
+    parser.add_argument('--progress-interval', type=float, default=5, help='Seconds between progress reports')
+    add_scraper_arguments(parser)
+    return parser
+
+
+def run_worker(argv: List[str]):
+    """
+    Work through a queue in this process until it is drained
+
+    Each leased shard is scraped with one WebScraper, so a host is never
+    fetched by two workers at once. A heartbeat thread keeps the leases
+    alive while the main loop makes progress; if the process dies, or hangs
+    for a whole visibility timeout, they expire and other workers retry its
+    URLs.
+    """
+    args = worker_parser().parse_args(argv)
+    worker = f"{socket.gethostname()}-{os.getpid()}"
+    timeout = args.visibility_timeout
+    queue = open_queue(args.queue, max_attempts=args.max_attempts)
+    scraper = build_scraper(args)
+    config = build_config(args)
+    if args.format == 'sqlite':
+        # Workers share one database
+        args.append = True
+    else:
+        args.output = f"{args.output}.{worker}"
+    sinks = open_sinks(args)
+
+    stop = threading.Event()
+    # Monotonic time the main loop last made progress (claimed, leased or finished work)
+    last_progress = [time.monotonic()]
+
+    def heartbeat():
+        failures_seen = len(scraper.failures)
+        stalled_reported = False
+        while not stop.wait(timeout / 3):
+            if len(scraper.failures) != failures_seen:
+                # Failed URLs are finished work too, even though they are only reported after the batch
+                failures_seen = len(scraper.failures)
+                last_progress[0] = time.monotonic()
+            stalled = time.monotonic() - last_progress[0]
+            if stalled >= timeout:
+                # A hung worker must not keep its URLs forever; let the leases expire
+                if not stalled_reported:
+                    print(f"Worker {worker} made no progress for {stalled:.0f}s, no longer renewing its leases")
+                    stalled_reported = True
+                continue
+            stalled_reported = False
+            try:
+                queue.heartbeat(worker, timeout)
+            except Exception as e:
+                print(f"Error renewing leases of worker {worker}: {e}")
+
+    threading.Thread(target=heartbeat, name='queue-heartbeat', daemon=True).start()
+    pages = failed = 0
+    try:
+        while True:
+            shard = queue.claim_shard(worker, timeout)
+            last_progress[0] = time.monotonic()
+            if shard is None:
+                progress = queue.progress()
+                if not progress['pending'] and not progress['leased']:
+                    break
+                # Wait for leases of other workers to finish or expire
+                time.sleep(min(2.0, timeout / 10))
+                continue
+            while True:
+                tasks = queue.lease(worker, shard, args.batch_size, timeout)
+                last_progress[0] = time.monotonic()
+                if not tasks:
+                    break
+                task_ids = {url: task_id for task_id, url in tasks}
+                first_failure = len(scraper.failures)
+                for result in scraper.iter_scrape(list(task_ids), config):
+                    for sink in sinks:
+                        sink.write(result)
+                    queue.ack(worker, [task_ids.pop(result['url'])])
+                    last_progress[0] = time.monotonic()
+                    pages += 1
+                failures = [(task_ids.pop(f['url']), f['type']) for f in scraper.failures[first_failure:]
+                            if f['url'] in task_ids]
+                queue.fail(worker, failures)
+                failed += len(failures)
+                # Dropped near-duplicates are done as well
+                queue.ack(worker, task_ids.values())
+            queue.release_shard(worker, shard)
+    finally:
+        stop.set()
+        for sink in sinks:
+            sink.close()
+        if scraper.cache:
+            scraper.cache.close()
+        if scraper.dedup:
+            scraper.dedup.close()
+        queue.close()
+    print(f"Worker {worker} finished: {pages} pages scraped, {failed} failed")
+
+
+def format_progress(progress: Dict[str, Any], rate: float) -> str:
+    """One-line summary of a queue's progress"""
+    finished = progress['done'] + progress['failed']
+    share = finished / progress['total'] if progress['total'] else 1.0
+    return (f"Progress: {finished}/{progress['total']} ({share:.1%}), {progress['done']} done, "
+            f"{progress['failed']} failed, {progress['leased']} leased, {progress['pending']} pending, "
+            f"{progress['active_shards']} active shards, {rate:.1f} pages/s")
+
+
+def worker_main(argv: List[str]):
+    """Command line interface of the worker subcommand"""
+    parser = worker_parser()
+    args = parser.parse_args(argv)
+    if args.incremental:
+        parser.error('--incremental is not supported by workers')
+    
+    try:
+        queue = open_queue(args.queue, shards=args.shards, max_attempts=args.max_attempts)
+    except (ValueError, sqlite3.Error) as e:
+        sys.exit(f"Cannot open work queue {args.queue}: {e}")
+    try:
+        added = queue.put(args.urls)
+        if args.url_file:
+            with open(args.url_file, encoding='utf-8') as f:
+                added += queue.put(line.strip() for line in f)
+        if added:
+            print(f"Added {added} URLs to {args.queue}")
+        if queue.skipped:
+            print(f"Skipped {queue.skipped} invalid URLs")
+        if args.retry_failed:
+            print(f"Requeued {queue.requeue_failed()} failed URLs")
+        
+        progress = queue.progress()
+        print(format_progress(progress, 0.0))
+        if args.status or not args.processes:
+            for worker, done in progress['workers'].items():
+                print(f"  {worker}: {done} done")
+            return
+        
+        processes = [multiprocessing.Process(target=run_worker, args=(argv,), name=f"worker-{i}")
+                     for i in range(args.processes)]
+        for process in processes:
+            process.start()
+        print(f"Started {len(processes)} worker processes")
+        
+        finished = progress['done'] + progress['failed']
+        started = time.monotonic()
+        try:
+            while any(process.is_alive() for process in processes):
+                for process in processes:
+                    process.join(args.progress_interval / len(processes))
+                progress = queue.progress()
+                rate = (progress['done'] + progress['failed'] - finished) / (time.monotonic() - started)
+                print(format_progress(progress, rate))
+        except KeyboardInterrupt:
+            # Leases of the stopped workers expire and their URLs are retried by the next run
+            for process in processes:
+                process.terminate()
+            raise
+        
+        print("\nQueue Summary:")
+        for worker, done in progress['workers'].items():
+            print(f"  {worker}: {done} done")
+        if progress['failed']:
+            print(f"Failed URLs: {progress['failed']} (rerun with --retry-failed to try them again)")
+    finally:
+        queue.close()
+
+
+def iter_result_file(path: str) -> Iterator[Dict[str, Any]]:
+    """Results of a .jsonl (streamed) or .json output file"""
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+def graph_main(argv: List[str]):
+    """Command line interface of the graph subcommand"""
+    parser = argparse.ArgumentParser(prog='WebScraper.py graph',
+                                     description='Analyse the link graph of scraped pages')
+    parser.add_argument('files', nargs='+', help='Result files written with --format json or jsonl')
+    parser.add_argument('--top', type=int, default=20, help='Number of pages to list by PageRank')
+    parser.add_argument('--links-to', metavar='URL', help='List the pages linking to URL')
+    parser.add_argument('--links-from', metavar='URL', help='List the links found on the page URL')
+    parser.add_argument('--damping', type=float, default=0.85, help='PageRank damping factor')
+    
+    args = parser.parse_args(argv)
+    
+    results = CompactResults()
+    for path in args.files:
+        for result in iter_result_file(path):
+            # Removal records of incremental deltas have no page data
+            if result.get('change') != 'removed':
+                results.append(result)
+    graph = results.graph()
+    print(f"{len(results)} pages, {len(graph)} URLs, {graph.edge_count} links")
+    
+    if args.links_to or args.links_from:
+        urls = graph.in_links(args.links_to) if args.links_to else graph.out_links(args.links_from)
+        for number, url in enumerate(urls, 1):
+            print(f"{number}. {url}")
+        if not urls:
+            print("No links")
         return
     
-    print(f"Successfully scraped {len(results)} pages")
+    ranks = graph.pagerank(damping=args.damping)
+    ranked = sorted(ranks.items(), key=lambda item: item[1], reverse=True)[:args.top]
+    for number, (url, rank) in enumerate(ranked, 1):
+        print(f"{number}. {rank:.5f} (in: {graph.in_degree(url)}) {url}")
+
+
+def main():
+    """Main function for command line interface"""
+    if len(sys.argv) > 1 and sys.argv[1] == 'crawl':
+        return crawl_main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == 'sitemap':
+        return sitemap_main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == 'query':
+        return query_main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == 'graph':
+        return graph_main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == 'worker':
+        return worker_main(sys.argv[2:])
+    
+    parser = argparse.ArgumentParser(description='Web Scraper App')
+    parser.add_argument('urls', nargs='+', help='URLs to scrape')
+    add_scraper_arguments(parser)
     
-    # Save results
-    if args.format in ['json', 'both']:
-        scraper.save_to_json(results, f"{args.output}.json")
+    args = parser.parse_args()
     
-    if args.format in ['csv', 'both']:
-        scraper.save_to_csv(results, f"{args.output}.csv")
+    # Create scraper instance
+    scraper = build_scraper(args)
     
-    # Print summary
-    print(f"\nScraping Summary:")
-    print(f"Pages scraped: {len(results)}")
-    total_links = sum(len(r.get('links', [])) for r in results)
-    total_images = sum(len(r.get('images', [])) for r in results)
-    print(f"Total links found: {total_links}")
-    print(f"Total images found: {total_images}")
+    # Configure extraction
+    config = build_config(args)
+    
+    # Scrape the URLs, writing each page out as soon as it is done
+    print(f"Starting to scrape {len(args.urls)} URLs...")
+    run_to_sinks(scraper, scraper.iter_scrape(args.urls, config), args)
 
 
 if __name__ == "__main__":
@@ -276,7 +1167,14 @@ if __name__ == "__main__":
         print("Example usage:")
         print("python web_scraper.py https://example.com")
         print("python web_scraper.py https://example.com --output my_data --format json")
+        print("python web_scraper.py https://site1.com https://site2.com --format jsonl --append")
         print("python web_scraper.py https://site1.com https://site2.com --delay 2")
+        print("python web_scraper.py https://site1.com https://site2.com --concurrency 8")
+        print("python web_scraper.py crawl https://example.com --max-depth 2 --max-pages 50")
+        print("python web_scraper.py https://example.com --format sqlite")
+        print("python web_scraper.py query scraped_data.sqlite3 \"free shipping\"")
+        print("python web_scraper.py graph scraped_data.json --top 10")
+        print("python web_scraper.py worker queue.sqlite3 --url-file urls.txt --processes 4")
         print()
         print("For help: python web_scraper.py --help")
         print()
@@ -1,14 +1,57 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
-from WebScraper import WebScraper
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory, stream_with_context
+from jobs import JobManager, JobQueueFull
+from result_store import ResultStore, cleanup_directory
+from sinks import iter_json_array, iter_csv_rows, TeeSink
+from instrumentation import Instrumentation, MetricsAggregator
 import os
 import json
 import csv
 from datetime import datetime
 import logging
+import zlib
+import threading
 from functools import wraps
 
 app = Flask(__name__, static_folder='static')
 
+# Upper bounds for the per-request concurrency and retries fields of /api/scrape
+MAX_SCRAPE_CONCURRENCY = 16
+MAX_SCRAPE_RETRIES = 5
+
+# Background jobs: at most MAX_RUNNING_JOBS scrape at once, the rest wait in line
+MAX_RUNNING_JOBS = int(os.environ.get('MAX_RUNNING_JOBS', 2))
+MAX_QUEUED_JOBS = int(os.environ.get('MAX_QUEUED_JOBS', 20))
+job_manager = JobManager(max_running=MAX_RUNNING_JOBS, max_queued=MAX_QUEUED_JOBS)
+
+# Per-stage timings of every scraper created by the app, exposed on /metrics
+instrumentation = Instrumentation()
+metrics = MetricsAggregator()
+instrumentation.register(metrics)
+
+# Warm HTTP sessions shared by all scrapers of this process; created on first
+# use so importing the app (a serverless cold start) doesn't load requests
+_session_pool = None
+_shared_lock = threading.Lock()
+
+def get_session_pool():
+    global _session_pool
+    with _shared_lock:
+        if _session_pool is None:
+            from session_pool import SessionPool
+            _session_pool = SessionPool(pool_maxsize=MAX_SCRAPE_CONCURRENCY)
+        return _session_pool
+
+# robots.txt files shared by all scrapers that respect them
+_robots_cache = None
+
+def get_robots_cache():
+    global _robots_cache
+    with _shared_lock:
+        if _robots_cache is None:
+            from robots import RobotsCache
+            _robots_cache = RobotsCache()
+        return _robots_cache
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,19 +60,33 @@ logger = logging.getLogger(__name__)
 def is_vercel():
     return os.environ.get('VERCEL', '').lower() in ('1', 'true')
 
+# Scrape results kept server-side for exports, cleaned up by age and count
+RESULTS_TTL = int(os.environ.get('RESULTS_TTL', 3600))
+MAX_STORED_RESULTS = int(os.environ.get('MAX_STORED_RESULTS', 200))
+result_store = ResultStore(
+    os.path.join('/tmp' if is_vercel() else 'temp', 'results'),
+    ttl=RESULTS_TTL,
+    max_entries=MAX_STORED_RESULTS
+)
+
+def open_indexed_sink(result_id):
+    """Store a job's results for exports and index them for /api/search"""
+    return TeeSink(result_store.open(result_id), result_store.open_index(result_id))
+
+# Limits for the legacy export files written to the temp directory
+EXPORT_TTL = int(os.environ.get('EXPORT_TTL', 3600))
+MAX_EXPORT_FILES = int(os.environ.get('MAX_EXPORT_FILES', 100))
+
 # Improved static files handler
 @app.route('/static/<path:filename>')
 def static_files(filename):
     static_path = os.path.join(os.getcwd(), 'static') if is_vercel() else app.static_folder
     return send_from_directory(static_path, filename)
 
-try:
-    import serverless_wsgi
-except ImportError:
-    serverless_wsgi = None
-
 def handler(event, context):
-    if serverless_wsgi is None:
+    try:
+        import serverless_wsgi
+    except ImportError:
         raise RuntimeError("serverless-wsgi is not available")
     return serverless_wsgi.handle_request(app, event, context)
 
@@ -38,6 +95,91 @@ def handler(event, context):
 def index():
     return render_template('index.html')
 
+@app.route('/health')
+def health():
+    return jsonify({'status': 'ok'})
+
+def parse_scrape_request(data):
+    """
+    Validate a scrape request body
+    
+    Returns:
+        Tuple of (urls, config, make_scraper) where make_scraper creates the
+        configured WebScraper
+    
+    Raises:
+        ValueError: If the request is invalid
+    """
+    if not data or 'urls' not in data:
+        raise ValueError('No URLs provided')
+    
+    # Ensure URLs is a list
+    urls = data['urls'] if isinstance(data['urls'], list) else [data['urls']]
+    urls = [url.strip() for url in urls if url.strip()]
+    
+    if not urls:
+        raise ValueError('Empty or invalid URLs provided')
+    
+    cache_dir = None
+    if data.get('cache'):
+        # Cache directories are always kept under the temp directory
+        temp_dir = '/tmp' if is_vercel() else 'temp'
+        cache_name = os.path.basename(str(data.get('cacheDir') or 'http_cache'))
+        if cache_name in ('', '.', '..'):
+            raise ValueError('Invalid cache directory')
+        cache_dir = os.path.join(temp_dir, cache_name)
+    
+    delay = float(data.get('delay', 1.0))
+    timeout = int(data.get('timeout', 10))
+    concurrency = min(int(data.get('concurrency', 1)), MAX_SCRAPE_CONCURRENCY)
+    cache_size = int(float(data.get('cacheSize', 100)) * 1024 * 1024)
+    cache_ttl = float(data.get('cacheTtl', 0))
+    max_bytes = int(float(data.get('maxBytes', 10)) * 1024 * 1024)
+    html_only = not bool(data.get('allowNonHtml', False))
+    retries = max(0, min(int(data.get('retries', 2)), MAX_SCRAPE_RETRIES))
+    backoff = float(data.get('backoff', 0.5))
+    dedup = data.get('dedup') or None
+    if dedup not in (None, 'mark', 'drop'):
+        raise ValueError('dedup must be "mark" or "drop"')
+    dedup_distance = max(0, min(int(data.get('dedupDistance', 6)), 32))
+    respect_robots = bool(data.get('robots', False))
+    
+    def make_scraper():
+        # Imported here so the scraping stack loads on the first scrape, not at startup
+        from WebScraper import WebScraper
+        from http_cache import ResponseCache
+        from dedup import Deduplicator
+        cache = ResponseCache(cache_dir, max_size=cache_size, ttl=cache_ttl) if cache_dir else None
+        return WebScraper(delay=delay, timeout=timeout, concurrency=concurrency, cache=cache,
+                          instrumentation=instrumentation, max_bytes=max_bytes, html_only=html_only,
+                          retries=retries, backoff=backoff, session=get_session_pool().get(),
+                          dedup=Deduplicator(dedup_distance, drop=dedup == 'drop') if dedup else None,
+                          robots=get_robots_cache() if respect_robots else None)
+    
+    schema = None
+    if data.get('schema'):
+        from schema import compile_schema
+        # Raises SchemaError (a ValueError) for malformed schemas
+        schema = compile_schema(data['schema'])
+    
+    # Configure extraction
+    config = {
+        'extract_links': bool(data.get('extractLinks', True)),
+        'extract_text': bool(data.get('extractText', True)),
+        'extract_images': bool(data.get('extractImages', True)),
+        'extract_tables': bool(data.get('extractTables', True)),
+        'text_selector': data.get('textSelector') or None,
+        'schema': schema
+    }
+    
+    return urls, config, make_scraper
+
+def close_scraper(scraper):
+    """Release resources held by a scraper created for a request"""
+    if scraper.cache:
+        logger.info(f"Cache hits: {scraper.cache_hits}, misses: {scraper.cache_misses}")
+        scraper.cache.close()
+
 @app.route('/api/scrape', methods=['POST'])
 def scrape():
     try:
@@ -45,49 +187,235 @@ def scrape():
         logger.info(f"Received scrape request: {data}")
         
         # Validate input
-        if not data or 'urls' not in data:
-            logger.error("No URLs provided")
-            return jsonify({'error': 'No URLs provided'}), 400
-            
-        # Ensure URLs is a list
-        urls = data['urls'] if isinstance(data['urls'], list) else [data['urls']]
-        urls = [url.strip() for url in urls if url.strip()]
-        
-        if not urls:
-            logger.error("Empty or invalid URLs provided")
-            return jsonify({'error': 'Empty or invalid URLs provided'}), 400
+        try:
+            urls, config, make_scraper = parse_scrape_request(data)
+        except ValueError as e:
+            logger.error(str(e))
+            return jsonify({'error': str(e)}), 400
         
         # Initialize scraper with options
-        scraper = WebScraper(
-            delay=float(data.get('delay', 1.0)),
-            timeout=int(data.get('timeout', 10))
-        )
-        
-        # Configure extraction
-        config = {
-            'extract_links': bool(data.get('extractLinks', True)),
-            'extract_text': bool(data.get('extractText', True)),
-            'extract_images': bool(data.get('extractImages', True)),
-            'extract_tables': bool(data.get('extractTables', True)),
-            'text_selector': data.get('textSelector') or None
-        }
+        scraper = make_scraper()
         
         logger.info(f"Starting scrape with config: {config}")
         
         # Scrape the URLs
-        results = scraper.scrape_multiple_pages(urls, config)
+        try:
+            results = scraper.scrape_multiple_pages(urls, config)
+        finally:
+            close_scraper(scraper)
+        
+        if scraper.failures:
+            logger.warning(f"Failed pages by type: {scraper.failure_counts()}")
         
         if not results:
             logger.warning("No results returned from scraper")
-            return jsonify({'error': 'No data was scraped successfully'}), 400
+            return jsonify({'error': 'No data was scraped successfully', 'failures': scraper.failures}), 400
             
-        logger.info(f"Successfully scraped {len(results)} pages")
-        return jsonify(results)
+        result_id = result_store.save(results)
+        if data.get('index'):
+            # Opt-in search index, reachable through /api/search with this result id
+            with result_store.open_index(result_id) as index:
+                for result in results:
+                    index.write(result)
+        logger.info(f"Successfully scraped {len(results)} pages, stored as {result_id}")
+        
+        response = jsonify(results)
+        response.headers['X-Result-Id'] = result_id
+        if scraper.failures:
+            # The body stays a plain list of pages; the details are served by /api/results/<id>/failures
+            result_store.save_failures(result_id, scraper.failures)
+            response.headers['X-Failure-Count'] = str(len(scraper.failures))
+        return response
     
     except Exception as e:
         logger.error(f"Scraping failed: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    if is_vercel():
+        # Serverless functions are frozen after responding, so a job would never run
+        return jsonify({'error': 'Background jobs are not available on this deployment, use /api/scrape'}), 501
+    try:
+        data = request.get_json()
+        logger.info(f"Received job request: {data}")
+        
+        try:
+            urls, config, make_scraper = parse_scrape_request(data)
+        except ValueError as e:
+            logger.error(str(e))
+            return jsonify({'error': str(e)}), 400
+        
+        try:
+            make_sink = open_indexed_sink if data.get('index') else result_store.open
+            job = job_manager.submit(urls, config, make_scraper, on_finish=close_scraper, make_sink=make_sink)
+        except JobQueueFull as e:
+            logger.warning(f"Job rejected: {e}")
+            return jsonify({'error': str(e)}), 429
+        
+        logger.info(f"Queued job {job.id} for {len(urls)} URLs")
+        return jsonify(job.to_dict()), 202
+    
+    except Exception as e:
+        logger.error(f"Job submission failed: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    status = job.to_dict()
+    status['failure_details'] = list(job.failures)
+    if request.args.get('results'):
+        status['results'] = list(job.results)
+    return jsonify(status)
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    logger.info(f"Cancel requested for job {job_id}")
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>/graph')
+def job_graph(job_id):
+    """PageRank of a job's link graph, or the in- and out-links of one URL (?url=...)"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    graph = job.graph()
+    url = request.args.get('url')
+    if url:
+        return jsonify({'url': url, 'in_links': graph.in_links(url), 'out_links': graph.out_links(url)})
+    
+    try:
+        top = max(1, min(int(request.args.get('top', 20)), 1000))
+    except ValueError:
+        return jsonify({'error': 'top must be an integer'}), 400
+    ranks = graph.pagerank()
+    ranked = sorted(ranks.items(), key=lambda item: item[1], reverse=True)[:top]
+    return jsonify({
+        'nodes': len(graph),
+        'edges': graph.edge_count,
+        'pages': [{'url': url, 'rank': rank, 'in_degree': graph.in_degree(url)} for url, rank in ranked]
+    })
+
+@app.route('/api/jobs/<job_id>/stream')
+def stream_job(job_id):
+    """Server-Sent Events stream of a job's page results"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    # Reconnecting EventSource clients send the id of the last page they got
+    start = request.headers.get('Last-Event-ID', request.args.get('from', '-1'))
+    start = int(start) + 1 if str(start).lstrip('-').isdigit() else 0
+    
+    def events():
+        index = start
+        for result in job.iter_results(start):
+            if result is None:
+                # Comment line keeps proxies from closing an idle stream
+                yield ': keep-alive\n\n'
+                continue
+            yield f"id: {index}\nevent: page\ndata: {json.dumps(result, ensure_ascii=False)}\n\n"
+            index += 1
+        yield f"event: done\ndata: {json.dumps(job.to_dict())}\n\n"
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/search')
+def search_results():
+    """
+    Paginated queries over the search index of one result
+    
+    Query parameters: resultId (of a scrape or job submitted with
+    "index": true), then q (full-text query), linksTo or linksFrom (a URL),
+    limit (at most 100) and offset.
+    """
+    from result_db import ResultDatabase
+    
+    path = result_store.index_path(request.args.get('resultId', ''))
+    if path is None:
+        return jsonify({'error': 'A valid resultId is required'}), 400
+    query = request.args.get('q', '').strip()
+    links_to = request.args.get('linksTo', '').strip()
+    links_from = request.args.get('linksFrom', '').strip()
+    if sum(map(bool, (query, links_to, links_from))) != 1:
+        return jsonify({'error': 'Provide exactly one of q, linksTo or linksFrom'}), 400
+    try:
+        limit = int(request.args.get('limit', 20))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    
+    if not os.path.exists(path):
+        return jsonify({'error': 'No search index for this result (scrape with "index": true)'}), 404
+    db = ResultDatabase(path)
+    try:
+        if links_to:
+            page = db.links_to(links_to, limit, offset)
+        elif links_from:
+            page = db.links_from(links_from, limit, offset)
+        else:
+            page = db.search(query, limit, offset)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    finally:
+        db.close()
+    return jsonify(page)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Scrape timings, response counters and job counts in Prometheus text format"""
+    lines = [metrics.render_prometheus()]
+    lines.append("# HELP webscraper_jobs Background jobs by status")
+    lines.append("# TYPE webscraper_jobs gauge")
+    for status, count in sorted(job_manager.status_counts().items()):
+        lines.append(f'webscraper_jobs{{status="{status}"}} {count}')
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+def gzip_chunks(chunks):
+    """Compress a stream of text chunks into gzip format on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+@app.route('/api/results/<result_id>/export/<fmt>')
+def export_result(result_id, fmt):
+    """Stream a stored result as a JSON or CSV download, gzip-compressed with ?gzip=1"""
+    if fmt not in ('json', 'csv'):
+        return jsonify({'error': 'Unsupported export format'}), 400
+    if not result_store.exists(result_id):
+        return jsonify({'error': 'Result not found'}), 404
+    
+    records = result_store.iter_results(result_id)
+    chunks = iter_json_array(records) if fmt == 'json' else iter_csv_rows(records)
+    mimetype = 'application/json' if fmt == 'json' else 'text/csv'
+    filename = f"scraped_data_{result_id[:8]}.{fmt}"
+    
+    if request.args.get('gzip', '').lower() in ('1', 'true'):
+        chunks = gzip_chunks(chunks)
+        mimetype = 'application/gzip'
+        filename += '.gz'
+    
+    logger.info(f"Streaming {fmt} export of {result_id}")
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+@app.route('/api/results/<result_id>/failures')
+def result_failures(result_id):
+    """Pages of a stored result that could not be scraped, with their failure type"""
+    if not result_store.exists(result_id):
+        return jsonify({'error': 'Result not found'}), 404
+    return jsonify(result_store.load_failures(result_id))
+
 @app.route('/api/export/json', methods=['POST'])
 def export_json():
     try:
@@ -99,6 +427,7 @@ def export_json():
         # Create appropriate temp directory
         temp_dir = '/tmp' if is_vercel() else 'temp'
         os.makedirs(temp_dir, exist_ok=True)
+        cleanup_directory(temp_dir, EXPORT_TTL, MAX_EXPORT_FILES, suffix='.json')
         
         # Create filename with timestamp
         filename = f"scraped_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -143,6 +472,7 @@ def export_csv():
         # Create appropriate temp directory
         temp_dir = '/tmp' if is_vercel() else 'temp'
         os.makedirs(temp_dir, exist_ok=True)
+        cleanup_directory(temp_dir, EXPORT_TTL, MAX_EXPORT_FILES, suffix='.csv')
         
         # Create filename with timestamp
         filename = f"scraped_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
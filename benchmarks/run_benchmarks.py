@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Offline throughput benchmarks for WebScraper
+
+Starts a local synthetic site (see site_server.py) and drives get_page,
+scrape_page, scrape_multiple_pages, HTML parsing, schema extraction and the
+/api/scrape endpoint against it. Each scenario runs in a fresh process so its peak RSS is its own.
+
+Examples:
+    python benchmarks/run_benchmarks.py --save baseline.json
+    python benchmarks/run_benchmarks.py --compare baseline.json
+    python benchmarks/run_benchmarks.py --scenario parse --page-kb 1024 --pages 20
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from site_server import SiteConfig, SyntheticSite  # noqa: E402
+
+SCENARIOS = ['get_page', 'parse', 'scrape_page', 'scrape_multiple_pages', 'schema', 'api_scrape']
+
+# Fields pulled from the synthetic pages by the schema scenario
+BENCH_SCHEMA = {
+    'heading': 'h1',
+    'page_path': {'selector': 'h1', 'regex': r'Page (\S+)'},
+    'first_image': {'selector': 'img', 'attr': 'src', 'type': 'url'},
+    'image_alts': {'selector': 'img[alt]', 'attr': 'alt', 'many': True},
+    'sections': {'selector': 'h2', 'many': True},
+    'table_headers': {'selector': 'table tr:first-child th', 'many': True},
+    'first_cell_row': {'selector': 'table td', 'regex': r'(\d+)\.', 'type': 'int'}
+}
+
+# Metrics where a lower value is better; everything else is higher-is-better
+LOWER_IS_BETTER = {'p50_ms', 'p95_ms', 'p99_ms', 'parse_s_per_mb', 'peak_rss_mb', 'elapsed_s'}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(latencies: List[float], pages: int, elapsed: float, extra: Dict[str, Any] = None) -> Dict[str, Any]:
+    metrics = {
+        'pages': pages,
+        'elapsed_s': round(elapsed, 4),
+        'pages_per_s': round(pages / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+    metrics.update(extra or {})
+    return metrics
+
+
+def adhoc_extract(soup, url: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply a schema the ad-hoc way: selectors and patterns handled as strings on every page"""
+    from urllib.parse import urljoin
+    fields = {}
+    for name, spec in schema.items():
+        if isinstance(spec, str):
+            spec = {'selector': spec}
+        elements = soup.select(spec['selector']) if spec.get('many') else [soup.select_one(spec['selector'])]
+        values = []
+        for element in elements:
+            if element is None:
+                continue
+            value = element.get(spec['attr']) if spec.get('attr') else element.get_text(strip=True)
+            if value is not None and spec.get('regex'):
+                match = re.search(spec['regex'], value)
+                value = (match.group(1) if match.re.groups else match.group(0)) if match else None
+            if value is not None and spec.get('type') == 'int':
+                value = int(value)
+            elif value is not None and spec.get('type') == 'url':
+                value = urljoin(url, value)
+            if value is not None:
+                values.append(value)
+        fields[name] = values if spec.get('many') else (values[0] if values else None)
+    return fields
+
+
+def timed_calls(func: Callable, items: List[Any]) -> List[float]:
+    latencies = []
+    for item in items:
+        start = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run_scenario(name: str, urls: List[str], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one scenario in the current process"""
+    from WebScraper import WebScraper
+    from extractor import DEFAULT_CONFIG, extract_result
+
+    def new_scraper(**kwargs):
+        return WebScraper(delay=0, timeout=30, parser=options['parser'], **kwargs)
+
+    # Keep the scraper's progress output out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        if name == 'get_page':
+            scraper = new_scraper()
+            start = time.perf_counter()
+            latencies = timed_calls(scraper.get_page, urls)
+            return summarize(latencies, len(urls), time.perf_counter() - start)
+
+        if name == 'parse':
+            scraper = new_scraper()
+            bodies = [scraper.fetch(url) for url in urls]
+            bodies = [(url, body) for url, body in zip(urls, bodies) if body]
+            megabytes = sum(len(body) for _, body in bodies) / (1024 * 1024)
+            start = time.perf_counter()
+            latencies = timed_calls(
+                lambda item: extract_result(item[0], item[1], DEFAULT_CONFIG, parser=options['parser']), bodies
+            )
+            elapsed = time.perf_counter() - start
+            return summarize(latencies, len(bodies), elapsed, {
+                'megabytes': round(megabytes, 3),
+                'parse_s_per_mb': round(elapsed / megabytes, 4) if megabytes else 0.0
+            })
+
+        if name == 'scrape_page':
+            scraper = new_scraper()
+            start = time.perf_counter()
+            latencies = timed_calls(scraper.scrape_page, urls)
+            return summarize(latencies, len(urls), time.perf_counter() - start)
+
+        if name == 'scrape_multiple_pages':
+            scraper = new_scraper(concurrency=options['concurrency'], parse_workers=options['parse_workers'])
+            latencies = []
+            scrape_page = scraper.scrape_page
+
+            def timed_scrape_page(url, config=None):
+                page_start = time.perf_counter()
+                try:
+                    return scrape_page(url, config)
+                finally:
+                    latencies.append(time.perf_counter() - page_start)
+
+            scraper.scrape_page = timed_scrape_page
+            start = time.perf_counter()
+            results = scraper.scrape_multiple_pages(urls)
+            return summarize(latencies, len(results), time.perf_counter() - start,
+                             {'concurrency': options['concurrency'], 'parse_workers': options['parse_workers']})
+
+        if name == 'schema':
+            from extractor import make_soup
+            from schema import compile_schema
+            scraper = new_scraper()
+            soups = [(url, make_soup(scraper.fetch(url), parser=options['parser'])) for url in urls]
+            plan = compile_schema(BENCH_SCHEMA)
+            for url, soup in soups:
+                if plan.apply(soup, url) != adhoc_extract(soup, url, BENCH_SCHEMA):
+                    raise AssertionError(f"Schema plan and ad-hoc extraction differ on {url}")
+            start = time.perf_counter()
+            adhoc_latencies = timed_calls(lambda item: adhoc_extract(item[1], item[0], BENCH_SCHEMA), soups)
+            adhoc_elapsed = time.perf_counter() - start
+            start = time.perf_counter()
+            latencies = timed_calls(lambda item: compile_schema(BENCH_SCHEMA).apply(item[1], item[0]), soups)
+            elapsed = time.perf_counter() - start
+            return summarize(latencies, len(soups), elapsed, {
+                'adhoc_pages_per_s': round(len(soups) / adhoc_elapsed, 2) if adhoc_elapsed else 0.0,
+                'adhoc_p50_ms': round(percentile(adhoc_latencies, 50) * 1000, 2),
+                'speedup': round(adhoc_elapsed / elapsed, 2) if elapsed else 0.0
+            })
+
+        if name == 'api_scrape':
+            # The app keeps results under ./temp; keep them out of the working tree
+            with tempfile.TemporaryDirectory(prefix='bench-api-') as workdir:
+                cwd = os.getcwd()
+                os.chdir(workdir)
+                try:
+                    return _api_scrape(urls, options)
+                finally:
+                    os.chdir(cwd)
+
+    raise ValueError(f"Unknown scenario: {name}")
+
+
+def _api_scrape(urls: List[str], options: Dict[str, Any]) -> Dict[str, Any]:
+    """POST batches of URLs to /api/scrape through the Flask test client"""
+    import logging
+    import app as flask_app
+    logging.disable(logging.CRITICAL)
+    client = flask_app.app.test_client()
+    batch = options['api_batch']
+    batches = [urls[i:i + batch] for i in range(0, len(urls), batch)]
+    pages = 0
+    latencies = []
+    start = time.perf_counter()
+    for chunk in batches:
+        request_start = time.perf_counter()
+        response = client.post('/api/scrape', json={
+            'urls': chunk, 'delay': 0, 'concurrency': options['concurrency']
+        })
+        latencies.append(time.perf_counter() - request_start)
+        if response.status_code == 200:
+            pages += len(response.get_json())
+    return summarize(latencies, pages, time.perf_counter() - start, {'batch_size': batch})
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB, or None if it cannot be measured"""
+    try:
+        import resource
+    except ImportError:
+        # Windows has no resource module; psutil reports the peak working set there
+        try:
+            import psutil
+        except ImportError:
+            return None
+        peak = getattr(psutil.Process().memory_info(), 'peak_wset', None)
+        return round(peak / (1024 * 1024), 1) if peak else None
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _child(name: str, urls: List[str], options: Dict[str, Any], queue):
+    try:
+        metrics = run_scenario(name, urls, options)
+        rss = peak_rss_mb()
+        if rss is not None:
+            metrics['peak_rss_mb'] = rss
+        queue.put(metrics)
+    except Exception as e:
+        queue.put({'error': repr(e)})
+
+
+def run_isolated(name: str, urls: List[str], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a scenario in a fresh process and return its metrics"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(name, urls, options, queue))
+    process.start()
+    metrics = queue.get()
+    process.join()
+    return metrics
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> bool:
+    """
+    Print current metrics next to a baseline
+
+    Returns:
+        True if any metric regressed by more than threshold percent
+    """
+    regressed = False
+    print(f"\nComparison with baseline {baseline['meta'].get('commit') or '?'} (threshold {threshold}%):")
+    for name, metrics in current['scenarios'].items():
+        base = baseline['scenarios'].get(name)
+        if not base:
+            continue
+        for key in ('pages_per_s', 'p50_ms', 'p95_ms', 'p99_ms', 'parse_s_per_mb', 'peak_rss_mb'):
+            if key not in metrics or not base.get(key):
+                continue
+            change = (metrics[key] - base[key]) / base[key] * 100
+            worse = change > threshold if key in LOWER_IS_BETTER else change < -threshold
+            regressed = regressed or worse
+            flag = '  REGRESSION' if worse else ''
+            print(f"  {name:<24}{key:<16}{base[key]:>12}{metrics[key]:>12}{change:>+9.1f}%{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline WebScraper benchmarks')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                        help='Scenario to run (repeatable, default: all)')
+    parser.add_argument('--pages', type=int, default=50, help='Pages per scenario')
+    parser.add_argument('--hosts', type=int, default=4, help='Number of synthetic hosts')
+    parser.add_argument('--page-kb', type=int, default=100, help='Page size (KB)')
+    parser.add_argument('--links-per-kb', type=float, default=1.0, help='Link density')
+    parser.add_argument('--tables', type=int, default=2, help='Tables per page')
+    parser.add_argument('--images', type=int, default=10, help='Images per page')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Artificial server latency')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of pages answering 500')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrency for batch scenarios')
+    parser.add_argument('--parse-workers', type=int, default=0, help='Parse processes for scrape_multiple_pages')
+    parser.add_argument('--parser', default='html.parser', help='HTML parser backend')
+    parser.add_argument('--api-batch', type=int, default=10, help='URLs per /api/scrape request')
+    parser.add_argument('--save', help='Write results to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Regression threshold (percent)')
+    args = parser.parse_args()
+
+    site_config = SiteConfig(
+        page_kb=args.page_kb,
+        links_per_kb=args.links_per_kb,
+        tables=args.tables,
+        images=args.images,
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        pages=max(args.pages, 1)
+    )
+    options = {
+        'concurrency': args.concurrency,
+        'parse_workers': args.parse_workers,
+        'parser': args.parser,
+        'api_batch': args.api_batch
+    }
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'site': site_config.to_dict(),
+            'hosts': args.hosts,
+            'options': options
+        },
+        'scenarios': {}
+    }
+
+    with SyntheticSite(site_config, hosts=args.hosts) as site:
+        urls = site.urls(args.pages)
+        for name in args.scenario or SCENARIOS:
+            print(f"Running {name}...", flush=True)
+            metrics = run_isolated(name, urls, options)
+            report['scenarios'][name] = metrics
+            print('  ' + ', '.join(f"{key}={value}" for key, value in metrics.items()), flush=True)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
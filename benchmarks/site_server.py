@@ -0,0 +1,177 @@
+"""
+Local synthetic-site server for offline benchmarks
+
+Serves deterministic HTML pages whose size, link density, table count and
+image count are configurable, with optional artificial latency and error
+rate. Every page is generated from a seed derived from its path, so two runs
+with the same settings see exactly the same site.
+"""
+
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any
+
+WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor '
+         'incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud').split()
+
+
+class SiteConfig:
+    """Shape of the generated pages"""
+
+    def __init__(self, page_kb: int = 100, links_per_kb: float = 1.0, tables: int = 2, table_rows: int = 20,
+                 images: int = 10, latency_ms: float = 0, error_rate: float = 0, pages: int = 1000):
+        """
+        Args:
+            page_kb: Approximate page size in kilobytes
+            links_per_kb: Number of links per kilobyte of page
+            tables: Tables per page
+            table_rows: Rows per table
+            images: Images per page
+            latency_ms: Delay before each response in milliseconds
+            error_rate: Fraction of pages that answer 500 (chosen by path, so repeatable)
+            pages: Number of distinct pages links point to
+        """
+        self.page_kb = page_kb
+        self.links_per_kb = links_per_kb
+        self.tables = tables
+        self.table_rows = table_rows
+        self.images = images
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.pages = pages
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+def _seed(path: str) -> int:
+    return int.from_bytes(hashlib.sha256(path.encode('utf-8')).digest()[:8], 'big')
+
+
+def generate_page(path: str, config: SiteConfig) -> bytes:
+    """Build the HTML for one path"""
+    rng = random.Random(_seed(path))
+    parts = [f"<!DOCTYPE html><html><head><title>Synthetic page {path}</title></head><body>",
+             f"<h1>Page {path}</h1>"]
+
+    for t in range(config.tables):
+        rows = ''.join(
+            '<tr>' + ''.join(f"<td>{rng.choice(WORDS)} {r}.{c}</td>" for c in range(4)) + '</tr>'
+            for r in range(config.table_rows)
+        )
+        parts.append(f"<table><tr><th>A</th><th>B</th><th>C</th><th>D</th></tr>{rows}</table>")
+
+    for i in range(config.images):
+        parts.append(f'<img src="/img/{rng.randrange(config.pages)}.png" alt="image {i}">')
+
+    target = config.page_kb * 1024
+    size = sum(len(p) for p in parts)
+    # Paragraphs are about half a KB; fractional link counts carry over to the next one
+    owed_links = 0.0
+    while size < target:
+        words = ' '.join(rng.choice(WORDS) for _ in range(80))
+        owed_links += max(0.0, config.links_per_kb * 0.5)
+        link_count = int(owed_links)
+        owed_links -= link_count
+        links = ''.join(
+            f' <a href="/page/{rng.randrange(config.pages)}?ref={rng.randrange(10)}">{rng.choice(WORDS)}</a>'
+            for _ in range(link_count)
+        )
+        paragraph = f"<p>{words}{links}</p>"
+        if rng.random() < 0.1:
+            paragraph = f"<h2>{rng.choice(WORDS).title()}</h2>" + paragraph
+        parts.append(paragraph)
+        size += len(paragraph)
+
+    parts.append('</body></html>')
+    return ''.join(parts).encode('utf-8')
+
+
+class SyntheticSite:
+    """Runs one or more synthetic hosts on 127.0.0.1 in background threads"""
+
+    def __init__(self, config: SiteConfig = None, hosts: int = 1):
+        """
+        Args:
+            config: Shape of the generated pages
+            hosts: Number of servers to start; each listens on its own port and
+                therefore counts as a separate host for per-host politeness
+        """
+        self.config = config or SiteConfig()
+        self.hosts = hosts
+        self.requests = 0
+        self._servers = []
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with site._lock:
+                    site.requests += 1
+                if site.config.latency_ms:
+                    time.sleep(site.config.latency_ms / 1000.0)
+
+                if random.Random(_seed('error' + self.path)).random() < site.config.error_rate:
+                    self.send_response(500)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                body = site.page(self.path)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def page(self, path: str) -> bytes:
+        """Generated body for a path, cached so generation does not skew timings"""
+        body = self._cache.get(path)
+        if body is None:
+            body = generate_page(path, self.config)
+            with self._lock:
+                self._cache[path] = body
+        return body
+
+    def start(self) -> 'SyntheticSite':
+        handler = self._handler()
+        for _ in range(self.hosts):
+            server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self._servers.append(server)
+        return self
+
+    def stop(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        self._servers = []
+
+    @property
+    def base_urls(self) -> List[str]:
+        return [f"http://127.0.0.1:{server.server_address[1]}" for server in self._servers]
+
+    def urls(self, count: int) -> List[str]:
+        """count page URLs spread round-robin over the hosts"""
+        bases = self.base_urls
+        return [f"{bases[i % len(bases)]}/page/{i % self.config.pages}" for i in range(count)]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
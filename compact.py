@@ -0,0 +1,301 @@
+"""
+Compact in-memory storage of scrape results
+
+Result dicts repeat the same URL strings on thousands of pages and carry a
+dict per image. CompactResults keeps each URL once in a URLTable, stores
+pages as __slots__ records whose links are integer id arrays, and turns
+back into the exact result dicts on demand. The links of all pages form a
+LinkGraph in compressed sparse row (CSR) form for in-link and out-link
+queries and PageRank.
+"""
+
+import os
+from array import array
+from typing import Dict, Any, List, Iterable, Iterator, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+# Key layouts shared by all records with the same result keys in the same order
+_layouts: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+IMAGE_KEYS = ('url', 'alt', 'filename')
+
+# Result keys held in PageRecord slots; any other key goes to PageRecord.extra
+RECORD_KEYS = frozenset(['url', 'title', 'timestamp', 'links', 'text', 'images', 'tables', 'fields'])
+
+
+class URLTable:
+    """Interning table mapping each distinct URL to a small integer id"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.urls: List[str] = []
+
+    def intern(self, url: str) -> int:
+        """Id of url, assigning the next id to URLs not seen before"""
+        url_id = self._ids.get(url)
+        if url_id is None:
+            url_id = self._ids[url] = len(self.urls)
+            self.urls.append(url)
+        return url_id
+
+    def get(self, url: str) -> Optional[int]:
+        """Id of url, or None if it was never interned"""
+        return self._ids.get(url)
+
+    def __getitem__(self, url_id: int) -> str:
+        return self.urls[url_id]
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+
+class PageRecord:
+    """One scrape result with its URLs replaced by URLTable ids"""
+
+    __slots__ = ('layout', 'url', 'title', 'timestamp', 'links', 'text', 'images', 'tables', 'fields', 'extra')
+
+    def __init__(self, layout, url, title, timestamp, links, text, images, tables, fields, extra):
+        self.layout = layout
+        self.url = url
+        self.title = title
+        self.timestamp = timestamp
+        self.links = links
+        self.text = text
+        self.images = images
+        self.tables = tables
+        self.fields = fields
+        self.extra = extra
+
+
+def _image_filename(url: str) -> str:
+    return os.path.basename(urlparse(url).path)
+
+
+class CompactResults:
+    """
+    Append-only list of scrape results in compact form
+
+    Behaves like a list of result dicts: len(), iteration, indexing and
+    slicing all return dicts equal to the ones that were added, with the
+    same key order.
+    """
+
+    def __init__(self, results: Iterable[Dict[str, Any]] = ()):
+        self.urls = URLTable()
+        self.image_urls = URLTable()
+        self.pages: List[PageRecord] = []
+        self._graph = None
+        for result in results:
+            self.append(result)
+
+    def append(self, result: Dict[str, Any]):
+        """Add a result dict"""
+        layout = tuple(result)
+        layout = _layouts.setdefault(layout, layout)
+        intern = self.urls.intern
+
+        links = result.get('links')
+        if links is not None:
+            links = array('l', map(intern, links))
+
+        images = result.get('images')
+        if images is not None:
+            packed = []
+            for image in images:
+                if tuple(image) != IMAGE_KEYS:
+                    # Unexpected shape, kept as it is
+                    packed.append(image)
+                    continue
+                url_id = self.image_urls.intern(image['url'])
+                if image['filename'] == _image_filename(image['url']):
+                    # The filename is derived from the URL again on the way out
+                    packed.append((url_id, image['alt']))
+                else:
+                    packed.append((url_id, image['alt'], image['filename']))
+            images = tuple(packed)
+
+        text = result.get('text')
+        extra = {key: result[key] for key in layout if key not in RECORD_KEYS}
+        self.pages.append(PageRecord(
+            layout, intern(result['url']), result.get('title'), result.get('timestamp'), links,
+            tuple(text) if text is not None else None, images, result.get('tables'), result.get('fields'),
+            extra or None
+        ))
+        self._graph = None
+
+    def to_dict(self, page: PageRecord) -> Dict[str, Any]:
+        """Rebuild the result dict of a record"""
+        urls = self.urls.urls
+        values = {
+            'url': urls[page.url],
+            'title': page.title,
+            'timestamp': page.timestamp,
+            'fields': page.fields,
+            'tables': page.tables,
+            'links': None,
+            'text': None,
+            'images': None
+        }
+        if page.links is not None:
+            values['links'] = [urls[url_id] for url_id in page.links]
+        if page.text is not None:
+            values['text'] = list(page.text)
+        if page.images is not None:
+            images = []
+            for image in page.images:
+                if isinstance(image, dict):
+                    images.append(image)
+                    continue
+                url = self.image_urls[image[0]]
+                images.append({'url': url, 'alt': image[1],
+                               'filename': image[2] if len(image) > 2 else _image_filename(url)})
+            values['images'] = images
+        if page.extra:
+            values.update(page.extra)
+        return {key: values[key] for key in page.layout}
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for page in self.pages:
+            yield self.to_dict(page)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        if isinstance(index, slice):
+            return [self.to_dict(page) for page in self.pages[index]]
+        return self.to_dict(self.pages[index])
+
+    def graph(self) -> 'LinkGraph':
+        """Link graph of the results added so far (rebuilt after further appends)"""
+        if self._graph is None:
+            self._graph = LinkGraph(self.urls, [(page.url, page.links) for page in self.pages
+                                                if page.links is not None])
+        return self._graph
+
+
+def _csr(size: int, edges: List[Tuple[int, array]], reverse: bool = False) -> Tuple[array, array]:
+    """
+    Offsets and neighbour ids of adjacency lists in CSR form
+
+    Args:
+        size: Number of nodes
+        edges: (source, target ids) pairs
+        reverse: Build the lists of incoming instead of outgoing edges
+    """
+    itemsize = array('l').itemsize
+    offsets = array('l', bytes(itemsize * (size + 1)))
+    for source, targets in edges:
+        if reverse:
+            for target in targets:
+                offsets[target + 1] += 1
+        else:
+            offsets[source + 1] += len(targets)
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    neighbours = array('l', bytes(itemsize * offsets[size]))
+    cursor = offsets[:-1]
+    for source, targets in edges:
+        if reverse:
+            for target in targets:
+                neighbours[cursor[target]] = source
+                cursor[target] += 1
+        else:
+            start = cursor[source]
+            neighbours[start:start + len(targets)] = targets
+            cursor[source] = start + len(targets)
+    return offsets, neighbours
+
+
+class LinkGraph:
+    """
+    Directed link graph over interned URLs in CSR form
+
+    Nodes are all URL ids of the URLTable, including link targets that
+    were never scraped. Out-links of node i are
+    targets[offsets[i]:offsets[i + 1]], and in-links are stored the same
+    way in a second, reversed CSR.
+    """
+
+    def __init__(self, urls: URLTable, pages: List[Tuple[int, array]]):
+        """
+        Args:
+            urls: Table the ids refer to
+            pages: (page id, link ids) pairs; a page listed twice gets the
+                links of both entries
+        """
+        self.urls = urls
+        size = len(urls)
+        self.offsets, self.targets = _csr(size, pages)
+        self.in_offsets, self.sources = _csr(size, pages, reverse=True)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def _id(self, url: str) -> Optional[int]:
+        url_id = self.urls.get(url)
+        return url_id if url_id is not None and url_id < len(self) else None
+
+    def out_links(self, url: str) -> List[str]:
+        """Links of a page in page order, duplicates included"""
+        url_id = self._id(url)
+        if url_id is None:
+            return []
+        return [self.urls[i] for i in self.targets[self.offsets[url_id]:self.offsets[url_id + 1]]]
+
+    def in_links(self, url: str) -> List[str]:
+        """Pages linking to url, each listed once"""
+        url_id = self._id(url)
+        if url_id is None:
+            return []
+        sources = self.sources[self.in_offsets[url_id]:self.in_offsets[url_id + 1]]
+        return [self.urls[i] for i in dict.fromkeys(sources)]
+
+    def out_degree(self, url: str) -> int:
+        url_id = self._id(url)
+        return 0 if url_id is None else self.offsets[url_id + 1] - self.offsets[url_id]
+
+    def in_degree(self, url: str) -> int:
+        url_id = self._id(url)
+        return 0 if url_id is None else self.in_offsets[url_id + 1] - self.in_offsets[url_id]
+
+    def pagerank(self, damping: float = 0.85, max_iterations: int = 100, tolerance: float = 1e-6) -> Dict[str, float]:
+        """
+        PageRank of every node by power iteration
+
+        The rank of pages without out-links (including unscraped link
+        targets) is spread evenly over all nodes.
+
+        Args:
+            damping: Probability of following a link rather than jumping
+            max_iterations: Upper bound on the number of iterations
+            tolerance: Stop once the L1 change of the ranks drops below this
+
+        Returns:
+            Dict of URL to rank; the ranks sum to 1
+        """
+        size = len(self)
+        if not size:
+            return {}
+        offsets, in_offsets, sources = self.offsets, self.in_offsets, self.sources
+        out_degree = [offsets[i + 1] - offsets[i] for i in range(size)]
+        dangling = [i for i in range(size) if not out_degree[i]]
+        rank = [1.0 / size] * size
+
+        for _ in range(max_iterations):
+            share = [r / d if d else 0.0 for r, d in zip(rank, out_degree)]
+            base = (1.0 - damping + damping * sum(rank[i] for i in dangling)) / size
+            new_rank = [base + damping * sum(map(share.__getitem__, sources[in_offsets[i]:in_offsets[i + 1]]))
+                        for i in range(size)]
+            change = sum(abs(a - b) for a, b in zip(new_rank, rank))
+            rank = new_rank
+            if change < tolerance:
+                break
+
+        urls = self.urls.urls
+        return {urls[i]: rank[i] for i in range(size)}
@@ -0,0 +1,239 @@
+"""
+Crawl mode for WebScraper
+
+Starts from a list of seed URLs and follows the links returned by
+extract_links, with URL canonicalization, scope rules, a depth limit and a
+page budget. The frontier and the set of already seen URLs live in a SQLite
+state file, so memory stays flat on large crawls and an interrupted crawl
+resumes where it stopped.
+"""
+
+import hashlib
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from extractor import DEFAULT_CONFIG
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_url(url: str) -> Optional[str]:
+    """
+    Normalize a URL so that equivalent spellings compare equal
+
+    Lower-cases the scheme and host, drops default ports and the fragment,
+    sorts the query parameters and uses '/' for an empty path.
+
+    Args:
+        url: Absolute URL
+
+    Returns:
+        Canonical URL, or None if it is not an http(s) URL
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    if ':' in host:
+        host = f"[{host}]"
+    if port is not None and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+
+def url_fingerprint(url: str) -> int:
+    """64-bit hash of a URL, stored instead of the URL string in the seen set"""
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
+
+
+class Frontier:
+    """Disk-backed FIFO queue of URLs to crawl plus the set of seen URL fingerprints"""
+
+    def __init__(self, path: str):
+        """
+        Open (or create) a crawl state file
+
+        Args:
+            path: SQLite file holding the queue, the seen set and crawl counters
+        """
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                leased INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS seen (fp INTEGER PRIMARY KEY) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+        # URLs handed out before an interruption were never completed
+        self._db.execute('UPDATE queue SET leased = 0 WHERE leased = 1')
+        self._db.commit()
+
+    def add(self, url: str, depth: int) -> bool:
+        """Queue a URL unless it was seen before. Returns True if it was queued."""
+        cursor = self._db.execute('INSERT OR IGNORE INTO seen (fp) VALUES (?)', (url_fingerprint(url),))
+        if cursor.rowcount != 1:
+            return False
+        self._db.execute('INSERT INTO queue (url, depth) VALUES (?, ?)', (url, depth))
+        return True
+
+    def commit(self):
+        """Persist pending changes"""
+        self._db.commit()
+
+    def take(self, limit: int) -> List[Tuple[int, str, int]]:
+        """Lease up to limit queued URLs as (id, url, depth) tuples"""
+        rows = self._db.execute(
+            'SELECT id, url, depth FROM queue WHERE leased = 0 ORDER BY id LIMIT ?', (limit,)
+        ).fetchall()
+        self._db.executemany('UPDATE queue SET leased = 1 WHERE id = ?', [(row[0],) for row in rows])
+        self._db.commit()
+        return rows
+
+    def done(self, item_id: int, counted: bool = True):
+        """
+        Remove a completed URL from the queue
+
+        Args:
+            item_id: Id returned by take()
+            counted: Count the URL against the page budget (False for failed fetches)
+        """
+        self._db.execute('DELETE FROM queue WHERE id = ?', (item_id,))
+        if not counted:
+            return
+        self._db.execute(
+            "INSERT INTO meta (key, value) VALUES ('pages', '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    def seed_hosts(self) -> List[str]:
+        """Hosts of the seed URLs recorded in this state file"""
+        return [row[0] for row in self._db.execute("SELECT value FROM meta WHERE key LIKE 'seed_host:%'")]
+
+    def add_seed_host(self, host: str):
+        """Remember a seed host so a resumed crawl keeps its scope"""
+        self._db.execute('INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)', (f"seed_host:{host}", host))
+
+    @property
+    def pages(self) -> int:
+        """Number of pages completed across all runs on this state file"""
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'pages'").fetchone()
+        return int(row[0]) if row else 0
+
+    def __len__(self) -> int:
+        return self._db.execute('SELECT COUNT(*) FROM queue').fetchone()[0]
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
+
+
+class Crawler:
+    """Breadth-first crawler driving a WebScraper instance"""
+
+    def __init__(self, scraper, state_path: str = 'crawl_state.sqlite3', max_depth: int = 2,
+                 max_pages: int = 100, same_domain: bool = True, allowed_domains: List[str] = None,
+                 config: Dict[str, Any] = None):
+        """
+        Initialize the crawler
+
+        Args:
+            scraper: WebScraper used to fetch and extract pages
+            state_path: SQLite file for the frontier, reused to resume a crawl
+            max_depth: Maximum number of link hops from a seed
+            max_pages: Budget of successfully scraped pages, including pages from earlier runs
+            same_domain: Only follow links to the hosts of the seed URLs
+            allowed_domains: Domains (and their subdomains) links may point to;
+                overrides same_domain when given
+            config: Extraction config passed to scrape_page; links are always
+                extracted to follow them, but only kept in the results when
+                the config asks for them
+        """
+        self.scraper = scraper
+        self.frontier = Frontier(state_path)
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.same_domain = same_domain
+        self.allowed_domains = [d.lower().lstrip('.') for d in allowed_domains or []]
+        self.config = dict(config or DEFAULT_CONFIG)
+        self.keep_links = bool(self.config.get('extract_links'))
+        self.config['extract_links'] = True
+
+        self._seed_hosts = set(self.frontier.seed_hosts())
+
+    def add_seeds(self, urls: List[str]) -> int:
+        """Queue seed URLs at depth 0. Returns the number of new URLs queued."""
+        added = 0
+        for url in urls:
+            canonical = canonicalize_url(url)
+            if not canonical:
+                print(f"Skipping invalid seed URL: {url}")
+                continue
+            host = urlsplit(canonical).hostname
+            if host not in self._seed_hosts:
+                self._seed_hosts.add(host)
+                self.frontier.add_seed_host(host)
+            if self.frontier.add(canonical, 0):
+                added += 1
+        self.frontier.commit()
+        return added
+
+    def in_scope(self, url: str) -> bool:
+        """Check a canonical URL against the allow-list or same-domain rule"""
+        host = urlsplit(url).hostname or ''
+        if self.allowed_domains:
+            return any(host == d or host.endswith('.' + d) for d in self.allowed_domains)
+        if self.same_domain:
+            return host in self._seed_hosts
+        return True
+
+    def crawl(self) -> Iterator[Dict[str, Any]]:
+        """
+        Crawl until the frontier is empty or the page budget is spent
+
+        Yields:
+            Result dicts from scrape_page, in crawl order
+        """
+        batch_size = self.scraper.concurrency
+        with ThreadPoolExecutor(max_workers=batch_size) as executor:
+            while True:
+                remaining = self.max_pages - self.frontier.pages
+                if remaining <= 0:
+                    break
+                batch = self.frontier.take(min(batch_size, remaining))
+                if not batch:
+                    break
+
+                results = executor.map(lambda item: self.scraper.scrape_page(item[1], self.config), batch)
+                for (item_id, url, depth), result in zip(batch, results):
+                    if result and depth < self.max_depth:
+                        for link in result.get('links', []):
+                            canonical = canonicalize_url(link)
+                            if canonical and self.in_scope(canonical):
+                                self.frontier.add(canonical, depth + 1)
+                    self.frontier.done(item_id, counted=result is not None)
+                    self.frontier.commit()
+                    if result and not self.keep_links:
+                        del result['links']
+                    # Links of near-duplicates are still followed above
+                    if result and self.scraper.dedup:
+                        result = self.scraper.dedup.check(result)
+                    if result:
+                        yield result
+
+    def close(self):
+        """Close the state file"""
+        self.frontier.close()
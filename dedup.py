@@ -0,0 +1,207 @@
+"""
+Near-duplicate detection for scraped pages
+
+Pages reachable under tracking parameters, print views or pagination
+variants usually carry (nearly) the same text. Deduplicator computes a
+64-bit SimHash over word shingles of each result's extracted text and looks
+it up in a SimHashIndex; a page within max_distance differing bits of an
+earlier page is a near-duplicate. Fingerprints can be kept in a SQLite file
+so later runs also recognise pages seen before.
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = 3
+
+# Fingerprint bits are summed in parallel: each of the 64 bits gets its own
+# LANE_BITS wide lane in one big integer, so adding a feature costs eight
+# table lookups instead of 64 bit tests
+LANE_BITS = 40
+_LANE_MASK = (1 << LANE_BITS) - 1
+_SPREAD = [
+    [sum(1 << ((position * 8 + bit) * LANE_BITS) for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+    for position in range(FINGERPRINT_BITS // 8)
+]
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def text_features(text: Iterable[str], shingle_size: int = SHINGLE_SIZE) -> Counter:
+    """
+    Count the word shingles of a page's text
+
+    Args:
+        text: Text blocks as returned in a result's 'text' list
+        shingle_size: Number of consecutive words per shingle
+
+    Returns:
+        Counter of shingle -> occurrences
+    """
+    words = WORD_PATTERN.findall(' '.join(text).lower())
+    if len(words) < shingle_size:
+        return Counter([' '.join(words)] if words else [])
+    return Counter(' '.join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1))
+
+
+def simhash(features: Dict[str, int]) -> int:
+    """
+    64-bit SimHash of weighted features
+
+    Each bit of the result is set when the features whose hash has that bit
+    set outweigh those whose hash does not.
+    """
+    lanes = 0
+    total = 0
+    for feature, weight in features.items():
+        h = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+        spread = 0
+        for position in range(FINGERPRINT_BITS // 8):
+            spread += _SPREAD[position][h >> (position * 8) & 0xFF]
+        lanes += spread * weight
+        total += weight
+
+    fingerprint = 0
+    for bit in range(FINGERPRINT_BITS):
+        if 2 * (lanes >> (bit * LANE_BITS) & _LANE_MASK) > total:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    # bin().count works on Python 3.9, which the Vercel deployment runs
+    return bin(a ^ b).count('1')
+
+
+class SimHashIndex:
+    """
+    Finds stored fingerprints within a Hamming distance of a query
+
+    Fingerprints are split into max_distance + 1 blocks. Two fingerprints
+    differing in at most max_distance bits agree exactly on at least one
+    block, so a lookup only compares against entries sharing a block.
+    """
+
+    def __init__(self, max_distance: int = 6):
+        self.max_distance = max_distance
+        blocks = max_distance + 1
+        edges = [FINGERPRINT_BITS * i // blocks for i in range(blocks + 1)]
+        self._blocks = [(start, (1 << (end - start)) - 1) for start, end in zip(edges, edges[1:])]
+        self._tables = [{} for _ in self._blocks]
+        self._size = 0
+
+    def _keys(self, fingerprint: int) -> List[int]:
+        return [fingerprint >> start & mask for start, mask in self._blocks]
+
+    def add(self, fingerprint: int, url: str):
+        entry = (fingerprint, url)
+        for table, key in zip(self._tables, self._keys(fingerprint)):
+            table.setdefault(key, []).append(entry)
+        self._size += 1
+
+    def find(self, fingerprint: int) -> Optional[Tuple[int, str]]:
+        """Closest stored (fingerprint, url) within max_distance, or None"""
+        best = None
+        best_distance = self.max_distance + 1
+        for table, key in zip(self._tables, self._keys(fingerprint)):
+            for entry in table.get(key, ()):
+                distance = hamming_distance(fingerprint, entry[0])
+                if distance < best_distance:
+                    best, best_distance = entry, distance
+                    if distance == 0:
+                        return best
+        return best
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class FingerprintStore:
+    """SQLite file of fingerprints of pages seen in earlier runs"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS fingerprints (fp INTEGER NOT NULL, url TEXT NOT NULL)')
+        self._db.commit()
+
+    def __iter__(self):
+        # SQLite integers are signed, fingerprints are not
+        for fp, url in self._db.execute('SELECT fp, url FROM fingerprints'):
+            yield fp & 0xFFFFFFFFFFFFFFFF, url
+
+    def add(self, fingerprint: int, url: str):
+        signed = fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+        self._db.execute('INSERT INTO fingerprints (fp, url) VALUES (?, ?)', (signed, url))
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+class Deduplicator:
+    """Marks or drops results whose text nearly duplicates an earlier page"""
+
+    def __init__(self, max_distance: int = 6, drop: bool = False, store_path: str = None):
+        """
+        Args:
+            max_distance: Maximum number of differing fingerprint bits for a near-duplicate
+            drop: Drop near-duplicates instead of marking them with 'duplicate_of'
+            store_path: Optional SQLite file that keeps fingerprints across runs
+        """
+        self.drop = drop
+        self.index = SimHashIndex(max_distance)
+        self.store = FingerprintStore(store_path) if store_path else None
+        self.checked = 0
+        self.duplicates = 0
+        self._lock = threading.Lock()
+        if self.store:
+            for fingerprint, url in self.store:
+                self.index.add(fingerprint, url)
+
+    @property
+    def ratio(self) -> float:
+        """Fraction of checked pages that were near-duplicates"""
+        return self.duplicates / self.checked if self.checked else 0.0
+
+    def check(self, result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Look a result up and remember it if it is new
+
+        Pages without extracted text are passed through unchecked.
+
+        Returns:
+            The result, with 'duplicate_of' set to the URL of the earlier page
+            if it is a near-duplicate, or None if it was dropped
+        """
+        features = text_features(result.get('text') or [])
+        if not features:
+            return result
+        fingerprint = simhash(features)
+
+        with self._lock:
+            self.checked += 1
+            match = self.index.find(fingerprint)
+            if match is not None and match[1] == result['url']:
+                # The same page again, e.g. from an earlier run of the store
+                return result
+            if match is None:
+                self.index.add(fingerprint, result['url'])
+                if self.store:
+                    self.store.add(fingerprint, result['url'])
+                return result
+            self.duplicates += 1
+
+        if self.drop:
+            return None
+        result['duplicate_of'] = match[1]
+        return result
+
+    def close(self):
+        if self.store:
+            self.store.close()
@@ -0,0 +1,253 @@
+"""
+Single-pass extraction engine used by WebScraper.scrape_page
+
+Collects links, text blocks, images and tables in one walk over the parsed
+tree instead of one find_all() per data type.
+"""
+
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+from urllib.parse import urljoin, urlparse
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+import os
+import time
+
+from schema import compile_schema, compile_selector
+
+try:
+    import lxml  # noqa: F401
+except ImportError:
+    lxml = None
+
+# Extraction config used when scrape_page is called without one
+DEFAULT_CONFIG = {
+    'extract_links': True,
+    'extract_text': True,
+    'extract_images': True,
+    'extract_tables': True,
+    'text_selector': None,
+    'schema': None
+}
+
+TEXT_TAGS = frozenset(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+CELL_TAGS = frozenset(['td', 'th'])
+
+
+def resolve_parser(parser: str = 'html.parser') -> str:
+    """
+    Pick the BeautifulSoup tree builder to use
+
+    Args:
+        parser: 'html.parser', 'lxml' or 'auto' (lxml when installed)
+
+    Returns:
+        Name of the tree builder to pass to BeautifulSoup
+    """
+    if parser == 'auto':
+        return 'lxml' if lxml is not None else 'html.parser'
+    return parser
+
+
+def build_strainer(config: Dict[str, Any]) -> Optional[SoupStrainer]:
+    """
+    Build a SoupStrainer that keeps only the tags the config needs
+
+    Returns None when the whole tree is required, e.g. when a custom
+    text_selector or an extraction schema can match any element.
+    """
+    if config.get('extract_text') and config.get('text_selector'):
+        return None
+    if config.get('schema'):
+        return None
+
+    names = ['title']
+    if config.get('extract_links'):
+        names.append('a')
+    if config.get('extract_text'):
+        names.extend(sorted(TEXT_TAGS))
+    if config.get('extract_images'):
+        names.append('img')
+    if config.get('extract_tables'):
+        names.append('table')
+    return SoupStrainer(names)
+
+
+def make_soup(content: bytes, config: Dict[str, Any] = None, parser: str = 'html.parser',
+              strain: bool = False) -> BeautifulSoup:
+    """
+    Parse page content into a BeautifulSoup tree
+
+    Args:
+        content: Raw page body
+        config: Extraction config, used to restrict the tree when strain is set
+        parser: Tree builder name, see resolve_parser()
+        strain: Only build the parts of the tree the config needs. Faster on
+            large pages, but malformed markup may nest differently than in a
+            full parse.
+
+    Returns:
+        BeautifulSoup object of the parsed HTML
+    """
+    parse_only = build_strainer(config) if strain and config else None
+    return BeautifulSoup(content, resolve_parser(parser), parse_only=parse_only)
+
+
+def extract_result(url: str, content: bytes, config: Dict[str, Any], parser: str = 'html.parser',
+                   strain: bool = False, timings: Dict[str, float] = None) -> Dict[str, Any]:
+    """
+    Parse a page body and build the scrape_page result dict
+
+    Only plain Python values end up in the result (the title is converted
+    from a NavigableString), so the result holds no reference to the tree
+    and can be sent between processes.
+
+    Args:
+        url: URL the content was fetched from
+        content: Raw page body
+        config: Configuration dict specifying what to extract
+        parser: Tree builder name, see resolve_parser()
+        strain: Only build the parts of the tree the config needs
+        timings: If given, receives the 'parse' and 'extract' durations in seconds
+
+    Returns:
+        Dictionary containing extracted data
+    """
+    if timings is not None:
+        start = time.perf_counter()
+    soup = make_soup(content, config, parser=parser, strain=strain)
+    if timings is not None:
+        parsed = time.perf_counter()
+        timings['parse'] = parsed - start
+
+    title = soup.title.string if soup.title else ''
+
+    data = {
+        'url': url,
+        'title': str(title) if title is not None else None,
+        'timestamp': datetime.now().isoformat()
+    }
+
+    # Links, text, images and tables are gathered in one tree traversal
+    data.update(extract_page(soup, url, config))
+
+    if config.get('schema'):
+        data['fields'] = compile_schema(config['schema']).apply(soup, url)
+
+    if timings is not None:
+        timings['extract'] = time.perf_counter() - parsed
+    return data
+
+
+def extract_page(soup: BeautifulSoup, base_url: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract links, text, images and tables in a single tree traversal
+
+    The output matches WebScraper.extract_links, extract_text, extract_images
+    and extract_table_data, including nested tables whose rows and cells are
+    also counted in every enclosing table.
+
+    Args:
+        soup: Parsed page
+        base_url: URL used to resolve relative links and image sources
+        config: Configuration dict specifying what to extract
+
+    Returns:
+        Dictionary with a key for every enabled data type
+    """
+    want_links = bool(config.get('extract_links'))
+    want_images = bool(config.get('extract_images'))
+    want_tables = bool(config.get('extract_tables'))
+    selector = config.get('text_selector')
+    want_text = bool(config.get('extract_text')) and not selector
+
+    links = []
+    text = []
+    images = []
+    tables = []
+    open_tables = []
+    open_rows = []
+
+    if want_links or want_images or want_tables or want_text:
+        # Iterative depth-first walk; each stack entry remembers which open
+        # table/row list has to be closed once its children are exhausted
+        stack = [(iter(soup.contents), None)]
+        while stack:
+            child = next(stack[-1][0], None)
+            if child is None:
+                _, closes = stack.pop()
+                if closes is not None:
+                    closes.pop()
+                continue
+            if not isinstance(child, Tag):
+                continue
+
+            name = child.name
+            closes = None
+
+            if name == 'a':
+                if want_links:
+                    href = child.get('href')
+                    if href is not None:
+                        links.append(urljoin(base_url, href))
+            elif name == 'img':
+                if want_images:
+                    src = child.get('src')
+                    if src:
+                        full_url = urljoin(base_url, src)
+                        images.append({
+                            'url': full_url,
+                            'alt': child.get('alt', ''),
+                            'filename': os.path.basename(urlparse(full_url).path)
+                        })
+            elif name in TEXT_TAGS:
+                if want_text:
+                    content = child.get_text(strip=True)
+                    if content:
+                        text.append(content)
+            elif want_tables:
+                if name == 'table':
+                    rows = []
+                    tables.append(rows)
+                    open_tables.append(rows)
+                    closes = open_tables
+                elif name == 'tr' and open_tables:
+                    row = []
+                    for rows in open_tables:
+                        rows.append(row)
+                    open_rows.append(row)
+                    closes = open_rows
+                elif name in CELL_TAGS and open_rows:
+                    cell = child.get_text(strip=True)
+                    for row in open_rows:
+                        row.append(cell)
+
+            if child.contents:
+                stack.append((iter(child.contents), closes))
+            elif closes is not None:
+                closes.pop()
+
+    data = {}
+    if want_links:
+        data['links'] = links
+    if config.get('extract_text'):
+        data['text'] = extract_selected_text(soup, selector) if selector else text
+    if want_images:
+        data['images'] = images
+    if want_tables:
+        tables_data = []
+        for rows in tables:
+            table_data = [row for row in rows if row]
+            if table_data:
+                tables_data.append(table_data)
+        data['tables'] = tables_data
+    return data
+
+
+def extract_selected_text(soup: BeautifulSoup, selector: str) -> List[str]:
+    """Extract non-empty text from the elements matching a CSS selector"""
+    texts = []
+    for elem in compile_selector(selector).select(soup):
+        content = elem.get_text(strip=True)
+        if content:
+            texts.append(content)
+    return texts
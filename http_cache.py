@@ -0,0 +1,185 @@
+"""
+Persistent HTTP response cache for WebScraper.fetch
+
+Bodies are stored as files, metadata (headers, validators, access times) in
+a small SQLite index next to them. Stale entries are revalidated with
+If-None-Match / If-Modified-Since and the total size is kept under a limit
+by evicting the least recently used entries.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from requests.structures import CaseInsensitiveDict
+
+
+class CacheEntry:
+    """A cached response body with the headers it was served with"""
+
+    def __init__(self, url: str, body: bytes, headers: Dict[str, str], stored_at: float):
+        self.url = url
+        self.body = body
+        # Servers and proxies may send validators as e.g. 'etag'
+        self.headers = CaseInsensitiveDict(headers)
+        self.stored_at = stored_at
+
+    def is_fresh(self, ttl: float) -> bool:
+        """True if the entry may be served without contacting the server"""
+        return ttl > 0 and time.time() - self.stored_at < ttl
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Request headers that let the server answer 304 Not Modified"""
+        headers = {}
+        if self.headers.get('ETag'):
+            headers['If-None-Match'] = self.headers['ETag']
+        if self.headers.get('Last-Modified'):
+            headers['If-Modified-Since'] = self.headers['Last-Modified']
+        return headers
+
+
+class ResponseCache:
+    """Size-bounded on-disk LRU cache of HTTP responses"""
+
+    def __init__(self, directory: str = '.http_cache', max_size: int = 100 * 1024 * 1024, ttl: float = 0):
+        """
+        Initialize the cache
+
+        Args:
+            directory: Directory holding the bodies and the index database
+            max_size: Maximum total size of cached bodies in bytes
+            ttl: Seconds an entry is served without revalidation (0 = always revalidate)
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(directory, 'index.sqlite3'), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                headers TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._db.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)')
+        self._db.commit()
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.body')
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """Look up a cached response, or None if the URL is not cached"""
+        key = self._key(url)
+        with self._lock:
+            row = self._db.execute('SELECT headers, stored_at FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            try:
+                with open(self._body_path(key), 'rb') as f:
+                    body = f.read()
+            except OSError:
+                # Body file went missing, forget the entry
+                self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self._db.commit()
+                return None
+            self._db.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            self._db.commit()
+        return CacheEntry(url, body, json.loads(row[0]), row[1])
+
+    def store(self, url: str, body: bytes, headers: Dict[str, str]):
+        """Store a response body and its headers, evicting old entries if needed"""
+        if 'no-store' in headers.get('Cache-Control', '').lower() or len(body) > self.max_size:
+            return
+
+        key = self._key(url)
+        path = self._body_path(key)
+        now = time.time()
+        with self._lock:
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+            self._db.execute(
+                'INSERT OR REPLACE INTO entries (key, url, headers, size, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (key, url, json.dumps(dict(headers)), len(body), now, now)
+            )
+            self._evict()
+            self._db.commit()
+
+    def refresh(self, url: str, headers: Dict[str, str]):
+        """Mark an entry as revalidated after a 304 response"""
+        key = self._key(url)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute('SELECT headers FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return
+            # A 304 may carry updated validators
+            stored = CaseInsensitiveDict(json.loads(row[0]))
+            for name in ('ETag', 'Last-Modified', 'Cache-Control', 'Expires'):
+                if headers.get(name):
+                    stored[name] = headers[name]
+            self._db.execute(
+                'UPDATE entries SET headers = ?, stored_at = ?, accessed_at = ? WHERE key = ?',
+                (json.dumps(dict(stored)), now, now, key)
+            )
+            self._db.commit()
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits max_size"""
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_size:
+            return
+        for key, size in self._db.execute('SELECT key, size FROM entries ORDER BY accessed_at').fetchall():
+            self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+            try:
+                os.remove(self._body_path(key))
+            except OSError:
+                pass
+            total -= size
+            if total <= self.max_size:
+                break
+
+    def record(self, outcome: str):
+        """Count a lookup outcome: 'hit', 'miss' or 'revalidated'"""
+        with self._lock:
+            if outcome == 'miss':
+                self.misses += 1
+            else:
+                self.hits += 1
+                if outcome == 'revalidated':
+                    self.revalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size of the cache"""
+        with self._lock:
+            entries, size = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'entries': entries,
+                'size': size
+            }
+
+    def close(self):
+        """Close the index database"""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,126 @@
+"""
+Incremental re-scrape state
+
+ScrapeState keeps a content hash and the last extraction result of every
+scraped URL in a SQLite file. When a page's body (and the extraction
+config) hashes the same as last time, WebScraper returns the stored result
+without parsing it again. Every result is tagged with a 'change' of 'new',
+'changed' or 'unchanged', and finish() reports the URLs that disappeared,
+so a run can write just the delta.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Iterable, Optional
+
+# Failed fetches with these statuses mean the page is gone rather than unreachable
+GONE_STATUSES = frozenset([404, 410])
+
+
+def config_key(config: Dict[str, Any]) -> str:
+    """Stable text form of an extraction config, so a config change invalidates stored results"""
+    # Compiled schemas are represented by their source schema
+    return json.dumps(config, sort_keys=True, default=lambda value: getattr(value, 'schema', repr(value)))
+
+
+class ScrapeState:
+    """SQLite store of content hashes and last results, one row per URL"""
+
+    def __init__(self, path: str):
+        """
+        Open (or create) a state file and start a new run
+
+        Args:
+            path: SQLite file holding the pages and the run counter
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._config_keys = {}
+        self.counts = {'new': 0, 'changed': 0, 'unchanged': 0, 'removed': 0}
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                hash BLOB NOT NULL,
+                result TEXT NOT NULL,
+                last_run INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'run'").fetchone()
+        self.run = (int(row[0]) if row else 0) + 1
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('run', ?)", (str(self.run),))
+        self._db.commit()
+
+    def digest(self, content: bytes, config: Dict[str, Any]) -> bytes:
+        """Hash of a page body together with the extraction config"""
+        key = self._config_keys.get(id(config))
+        if key is None or key[0] is not config:
+            key = self._config_keys[id(config)] = (config, config_key(config).encode('utf-8'))
+        h = hashlib.blake2b(key[1], digest_size=16)
+        h.update(b'\0')
+        h.update(content)
+        return h.digest()
+
+    def unchanged(self, url: str, digest: bytes) -> Optional[Dict[str, Any]]:
+        """
+        Stored result of url if its digest matches, tagged 'unchanged'
+
+        Returns:
+            The last result, or None if the page is new or changed
+        """
+        with self._lock:
+            row = self._db.execute('SELECT hash, result FROM pages WHERE url = ?', (url,)).fetchone()
+            if row is None or row[0] != digest:
+                return None
+            self._db.execute('UPDATE pages SET last_run = ? WHERE url = ?', (self.run, url))
+            self._db.commit()
+            self.counts['unchanged'] += 1
+        result = json.loads(row[1])
+        result['change'] = 'unchanged'
+        return result
+
+    def record(self, url: str, digest: bytes, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a freshly extracted result and tag it 'new' or 'changed'"""
+        stored = json.dumps(result, ensure_ascii=False)
+        with self._lock:
+            exists = self._db.execute('SELECT 1 FROM pages WHERE url = ?', (url,)).fetchone() is not None
+            self._db.execute(
+                'INSERT OR REPLACE INTO pages (url, hash, result, last_run, updated_at) VALUES (?, ?, ?, ?, ?)',
+                (url, digest, stored, self.run, time.time())
+            )
+            self._db.commit()
+            change = 'changed' if exists else 'new'
+            self.counts[change] += 1
+        result['change'] = change
+        return result
+
+    def finish(self, retained: Iterable[str] = ()) -> List[str]:
+        """
+        End the run and forget the pages it did not see
+
+        Args:
+            retained: URLs to keep although they were not scraped, e.g. pages
+                that failed with a timeout rather than a 404
+
+        Returns:
+            URLs removed since the previous run, in URL order
+        """
+        with self._lock:
+            self._db.executemany('UPDATE pages SET last_run = ? WHERE url = ?',
+                                 [(self.run, url) for url in retained])
+            removed = [row[0] for row in self._db.execute(
+                'SELECT url FROM pages WHERE last_run < ? ORDER BY url', (self.run,))]
+            self._db.execute('DELETE FROM pages WHERE last_run < ?', (self.run,))
+            self._db.commit()
+            self.counts['removed'] += len(removed)
+        return removed
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,188 @@
+"""
+Lightweight instrumentation for WebScraper
+
+WebScraper.fetch and scrape_page emit one event per stage group when an
+Instrumentation with at least one callback is attached; with no callbacks
+the scraper skips all timing work. MetricsAggregator is a ready-made
+callback that keeps per-host counters and histograms and renders them in
+Prometheus text format.
+"""
+
+import threading
+import time
+from typing import Dict, Any, Callable
+
+# Stages reported in event['durations']
+STAGES = ['wait', 'connect', 'ttfb', 'download', 'parse', 'extract']
+
+# Upper bounds (seconds) of the duration histogram buckets
+DURATION_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+_connect_timing = threading.local()
+_timed_classes = {}
+
+
+def reset_connect_time():
+    """Start measuring connection setup time on the current thread"""
+    _connect_timing.seconds = 0.0
+
+
+def connect_time() -> float:
+    """Seconds spent opening connections on this thread since reset_connect_time()"""
+    return getattr(_connect_timing, 'seconds', 0.0)
+
+
+def timed_connection_class(base):
+    """Subclass of a urllib3 connection class whose connect() is timed"""
+    cls = _timed_classes.get(base)
+    if cls is None:
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                return base.connect(self)
+            finally:
+                _connect_timing.seconds = connect_time() + time.perf_counter() - start
+
+        cls = type('Timed' + base.__name__, (base,), {'connect': connect})
+        _timed_classes[base] = cls
+    return cls
+
+
+class Instrumentation:
+    """Registry of callbacks receiving scraper timing events"""
+
+    def __init__(self):
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._callbacks)
+
+    @property
+    def callbacks(self):
+        return list(self._callbacks)
+
+    def register(self, callback: Callable[[Dict[str, Any]], None]):
+        """
+        Register a callback
+
+        The callback receives event dicts with the keys 'event' ('fetch',
+        'scrape' or 'error'), 'url', 'host' and, depending on the event,
+        'status', 'bytes', 'cache', 'error' and 'durations' (stage name to
+        seconds). Callbacks may be called from several threads at once.
+        """
+        with self._lock:
+            self._callbacks = self._callbacks + [callback]
+
+    def unregister(self, callback: Callable[[Dict[str, Any]], None]):
+        with self._lock:
+            self._callbacks = [c for c in self._callbacks if c is not callback]
+
+    def emit(self, event: Dict[str, Any]):
+        for callback in self._callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Instrumentation callback failed: {e}")
+
+
+class MetricsAggregator:
+    """Aggregates instrumentation events into per-host counters and histograms"""
+
+    def __init__(self, max_hosts: int = 100, prefix: str = 'webscraper'):
+        """
+        Args:
+            max_hosts: Hosts tracked individually; later hosts are reported as 'other'
+            prefix: Prefix of the exported metric names
+        """
+        self.max_hosts = max_hosts
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._hosts = set()
+        self._durations = {}   # (stage, host) -> [bucket counts..., sum, count]
+        self._responses = {}   # (host, status) -> count
+        self._bytes = {}       # host -> bytes
+        self._errors = {}      # (host, error type) -> count
+        self._cache = {}       # result -> count
+
+    def _host(self, host: str) -> str:
+        if host in self._hosts:
+            return host
+        if len(self._hosts) < self.max_hosts:
+            self._hosts.add(host)
+            return host
+        return 'other'
+
+    def __call__(self, event: Dict[str, Any]):
+        with self._lock:
+            host = self._host(event.get('host', ''))
+            for stage, seconds in event.get('durations', {}).items():
+                series = self._durations.get((stage, host))
+                if series is None:
+                    series = self._durations[(stage, host)] = [0] * len(DURATION_BUCKETS) + [0.0, 0]
+                for index, bound in enumerate(DURATION_BUCKETS):
+                    if seconds <= bound:
+                        series[index] += 1
+                series[-2] += seconds
+                series[-1] += 1
+            if 'status' in event:
+                key = (host, str(event['status']))
+                self._responses[key] = self._responses.get(key, 0) + 1
+            if event.get('bytes'):
+                self._bytes[host] = self._bytes.get(host, 0) + event['bytes']
+            if event['event'] == 'error':
+                key = (host, event.get('error', 'unknown'))
+                self._errors[key] = self._errors.get(key, 0) + 1
+            if event.get('cache'):
+                self._cache[event['cache']] = self._cache.get(event['cache'], 0) + 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Total seconds and call count per stage across all hosts"""
+        totals = {}
+        with self._lock:
+            for (stage, _), series in self._durations.items():
+                stage_total = totals.setdefault(stage, {'seconds': 0.0, 'count': 0})
+                stage_total['seconds'] += series[-2]
+                stage_total['count'] += series[-1]
+        return {stage: totals[stage] for stage in STAGES if stage in totals}
+
+    def render_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        p = self.prefix
+        lines = []
+        with self._lock:
+            lines.append(f"# HELP {p}_stage_duration_seconds Time spent per scrape stage")
+            lines.append(f"# TYPE {p}_stage_duration_seconds histogram")
+            for (stage, host), series in sorted(self._durations.items()):
+                labels = f'stage="{stage}",host="{_escape(host)}"'
+                for index, bound in enumerate(DURATION_BUCKETS):
+                    lines.append(f'{p}_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {series[index]}')
+                lines.append(f'{p}_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {series[-1]}')
+                lines.append(f'{p}_stage_duration_seconds_sum{{{labels}}} {series[-2]:.6f}')
+                lines.append(f'{p}_stage_duration_seconds_count{{{labels}}} {series[-1]}')
+
+            lines.append(f"# HELP {p}_responses_total HTTP responses by status code")
+            lines.append(f"# TYPE {p}_responses_total counter")
+            for (host, status), count in sorted(self._responses.items()):
+                lines.append(f'{p}_responses_total{{host="{_escape(host)}",status="{status}"}} {count}')
+
+            lines.append(f"# HELP {p}_response_bytes_total Response body bytes downloaded")
+            lines.append(f"# TYPE {p}_response_bytes_total counter")
+            for host, count in sorted(self._bytes.items()):
+                lines.append(f'{p}_response_bytes_total{{host="{_escape(host)}"}} {count}')
+
+            lines.append(f"# HELP {p}_errors_total Failed fetches by error type")
+            lines.append(f"# TYPE {p}_errors_total counter")
+            for (host, error), count in sorted(self._errors.items()):
+                lines.append(f'{p}_errors_total{{host="{_escape(host)}",type="{_escape(error)}"}} {count}')
+
+            lines.append(f"# HELP {p}_cache_lookups_total Response cache lookups by outcome")
+            lines.append(f"# TYPE {p}_cache_lookups_total counter")
+            for result, count in sorted(self._cache.items()):
+                lines.append(f'{p}_cache_lookups_total{{result="{result}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
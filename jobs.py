@@ -0,0 +1,222 @@
+"""
+Background scrape jobs for the Flask app
+
+Jobs run on a small thread pool; submissions beyond the pool size wait in a
+bounded queue. Each job keeps the results produced so far, in compact form,
+so clients can poll its status or stream pages as they complete.
+"""
+
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional, Callable
+
+from compact import CompactResults, LinkGraph
+
+
+class JobQueueFull(Exception):
+    """Raised when the job queue has no room for another job"""
+
+
+class ScrapeJob:
+    """State of one background scrape"""
+
+    def __init__(self, urls: List[str], config: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.urls = urls
+        self.config = config
+        self.status = 'queued'
+        self.results = CompactResults()
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.future = None
+        self.result_id = None
+        self.failures = []
+        self._cancel = threading.Event()
+        self._changed = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('done', 'failed', 'cancelled')
+
+    def _update(self, **fields):
+        with self._changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self._changed.notify_all()
+
+    def _add_result(self, result: Dict[str, Any]):
+        with self._changed:
+            self.results.append(result)
+            self._changed.notify_all()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Status summary without the page results"""
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'total': len(self.urls),
+            'scraped': len(self.results),
+            'result_id': self.result_id,
+            'failures': self.failure_counts(),
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
+
+    def graph(self) -> LinkGraph:
+        """Link graph of the pages scraped so far"""
+        with self._changed:
+            return self.results.graph()
+
+    def failure_counts(self) -> Dict[str, int]:
+        """Number of pages that failed, per failure type"""
+        counts = {}
+        for failure in list(self.failures):
+            counts[failure['type']] = counts.get(failure['type'], 0) + 1
+        return counts
+
+    def iter_results(self, start: int = 0, timeout: float = 15.0) -> Iterator[Optional[Dict[str, Any]]]:
+        """
+        Follow the job's results as they are produced
+
+        Args:
+            start: Index of the first result to return
+            timeout: Seconds to wait for progress before yielding None, which
+                lets callers send keep-alives
+
+        Yields:
+            Result dicts in order, or None when nothing happened for timeout seconds
+        """
+        index = start
+        while True:
+            with self._changed:
+                if index >= len(self.results) and not self.finished:
+                    self._changed.wait(timeout)
+                batch = self.results[index:]
+                finished = self.finished
+            if not batch and not finished:
+                yield None
+            for result in batch:
+                yield result
+            index += len(batch)
+            if finished and index >= len(self.results):
+                return
+
+
+class JobManager:
+    """Runs scrape jobs in the background with a cap on concurrent jobs"""
+
+    def __init__(self, max_running: int = 2, max_queued: int = 20, max_finished: int = 50):
+        """
+        Initialize the job manager
+
+        Args:
+            max_running: Jobs executed at the same time
+            max_queued: Jobs allowed to wait behind the running ones
+            max_finished: Finished jobs kept for status and result queries
+        """
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_running, thread_name_prefix='scrape-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, urls: List[str], config: Dict[str, Any], make_scraper: Callable[[], Any],
+               on_finish: Callable[[Any], None] = None, make_sink: Callable[[str], Any] = None) -> ScrapeJob:
+        """
+        Queue a scrape job
+
+        Args:
+            urls: URLs to scrape
+            config: Extraction config passed to the scraper
+            make_scraper: Called on the worker thread to create the WebScraper
+            on_finish: Called with the scraper once the job ends, e.g. to close a cache
+            make_sink: Called with the job id to open a sink that persists every
+                result; the job id then doubles as the result id
+
+        Returns:
+            The queued job
+
+        Raises:
+            JobQueueFull: If max_running + max_queued jobs are already pending
+        """
+        job = ScrapeJob(urls, config)
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if not j.finished)
+            if pending >= self.max_running + self.max_queued:
+                raise JobQueueFull(f"Too many jobs pending ({pending})")
+            self._jobs[job.id] = job
+            self._prune()
+            job.future = self._executor.submit(self._run, job, make_scraper, on_finish, make_sink)
+        return job
+
+    def get(self, job_id: str) -> Optional[ScrapeJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status_counts(self) -> Dict[str, int]:
+        """Number of known jobs per status"""
+        counts = {'queued': 0, 'running': 0}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def cancel(self, job_id: str) -> Optional[ScrapeJob]:
+        """Cancel a queued or running job. Pages already scraped are kept."""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        job._cancel.set()
+        if job.future.cancel():
+            # Never started
+            job._update(status='cancelled', finished_at=time.time())
+        return job
+
+    def _run(self, job: ScrapeJob, make_scraper: Callable[[], Any], on_finish: Callable[[Any], None],
+             make_sink: Callable[[str], Any]):
+        if job._cancel.is_set():
+            job._update(status='cancelled', finished_at=time.time())
+            return
+        job._update(status='running')
+        scraper = None
+        sink = None
+        try:
+            if make_sink:
+                sink = make_sink(job.id)
+                job.result_id = job.id
+            scraper = make_scraper()
+            # Failed pages are recorded by the scraper as they happen
+            job.failures = scraper.failures
+            # Stop handing out URLs as soon as the job is cancelled
+            urls = itertools.takewhile(lambda url: not job._cancel.is_set(), job.urls)
+            pages = scraper.iter_scrape(urls, job.config)
+            try:
+                for result in pages:
+                    if sink:
+                        sink.write(result)
+                    job._add_result(result)
+                    if job._cancel.is_set():
+                        break
+            finally:
+                pages.close()
+            job._update(status='cancelled' if job._cancel.is_set() else 'done', finished_at=time.time())
+        except Exception as e:
+            job._update(status='failed', error=str(e), finished_at=time.time())
+        finally:
+            if sink:
+                sink.close()
+            if on_finish and scraper is not None:
+                on_finish(scraper)
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond max_finished"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
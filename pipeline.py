@@ -0,0 +1,125 @@
+"""
+Pipelined fetch/parse execution
+
+I/O threads download raw page bodies and a process pool parses them and
+runs extraction, so HTML parsing is no longer limited to one core by the
+GIL. Only the raw bytes and the extracted result dicts cross process
+boundaries.
+"""
+
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, Iterable, Iterator
+
+from extractor import DEFAULT_CONFIG, extract_result
+
+
+class ScrapePipeline:
+    """Two-stage fetch (threads) / parse (processes) pipeline for a WebScraper"""
+
+    def __init__(self, scraper, workers: int = None, max_pending: int = None):
+        """
+        Initialize the pipeline
+
+        Args:
+            scraper: WebScraper whose fetch() and parser settings are used;
+                its concurrency sets the number of fetch threads
+            workers: Number of parse processes (default: CPU count)
+            max_pending: Maximum number of pages fetched or parsed but not yet
+                consumed; bounds the raw bytes held in memory and makes the
+                fetch stage wait when the parse stage falls behind
+        """
+        self.scraper = scraper
+        self.workers = workers or multiprocessing.cpu_count()
+        self.max_pending = max_pending or 2 * (scraper.concurrency + self.workers)
+
+    def _context(self):
+        # Fetch threads are already running when the pool starts processes;
+        # forking a multi-threaded process is unsafe, so avoid plain fork
+        methods = multiprocessing.get_all_start_methods()
+        return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+    def run(self, urls: Iterable[str], config: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Scrape pages through the pipeline
+
+        Args:
+            urls: URLs to scrape, may be any iterable including a generator
+            config: Configuration dict specifying what to extract
+
+        Yields:
+            Result dicts of the pages scraped successfully, in input order
+        """
+        config = config or DEFAULT_CONFIG
+        parser = self.scraper.parser
+        strain = self.scraper.strain
+        state = self.scraper.state
+
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=self._context()) as parse_pool, \
+                ThreadPoolExecutor(max_workers=self.scraper.concurrency) as fetch_pool:
+
+            def submit(url: str) -> Future:
+                result = Future()
+
+                def settle(value=None, error: Exception = None):
+                    # The consumer may have cancelled the page meanwhile
+                    if result.set_running_or_notify_cancel():
+                        if error is not None:
+                            result.set_exception(error)
+                        else:
+                            result.set_result(value)
+
+                digest = None
+
+                def parsed(parse_future: Future):
+                    try:
+                        data = parse_future.result()
+                        settle(state.record(url, digest, data) if state else data)
+                    except Exception as e:
+                        settle(error=e)
+
+                def fetched(fetch_future: Future):
+                    nonlocal digest
+                    try:
+                        content = fetch_future.result()
+                        if content is None or result.cancelled():
+                            settle(None)
+                            return
+                        if state:
+                            # Unchanged pages never reach the parse processes
+                            digest = state.digest(content, config)
+                            previous = state.unchanged(url, digest)
+                            if previous is not None:
+                                settle(previous)
+                                return
+                        parse_pool.submit(extract_result, url, content, config, parser, strain).add_done_callback(parsed)
+                    except Exception as e:
+                        settle(error=e)
+
+                fetch_pool.submit(self.scraper.fetch, url).add_done_callback(fetched)
+                return result
+
+            pending = deque()
+            try:
+                for url in urls:
+                    pending.append((url, submit(url)))
+                    if len(pending) >= self.max_pending:
+                        page = self._collect(*pending.popleft())
+                        if page:
+                            yield page
+                while pending:
+                    page = self._collect(*pending.popleft())
+                    if page:
+                        yield page
+            finally:
+                # Let in-flight work finish quietly if the consumer stops early
+                for _, future in pending:
+                    future.cancel()
+
+    def _collect(self, url: str, future: Future) -> Dict[str, Any]:
+        """Wait for one page; a page that fails to parse is recorded as a parse_error failure"""
+        try:
+            return future.result()
+        except Exception as e:
+            return self.scraper.record_parse_error(url, e)
@@ -0,0 +1,244 @@
+"""
+SQLite storage and search for scrape results
+
+SQLiteSink writes results into normalized tables (pages, links, images,
+table cells) in batched transactions, with an FTS5 index over each page's
+title and text. ResultDatabase runs paginated full-text and link queries
+against such a file; every query reads one page of rows, so the store is
+never loaded into memory.
+"""
+
+import json
+import os
+import sqlite3
+from typing import Dict, Any, List, Optional
+from urllib.request import pathname2url
+
+from sinks import ResultSink
+
+# Result keys with a table or column of their own; everything else goes to pages.extra
+STORED_KEYS = frozenset(['url', 'title', 'timestamp', 'text', 'links', 'images', 'tables', 'fields'])
+
+MAX_QUERY_LIMIT = 100
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS pages (
+        id INTEGER PRIMARY KEY,
+        url TEXT NOT NULL UNIQUE,
+        title TEXT,
+        timestamp TEXT,
+        text TEXT NOT NULL DEFAULT '',
+        fields TEXT,
+        extra TEXT
+    );
+    CREATE TABLE IF NOT EXISTS links (
+        page_id INTEGER NOT NULL REFERENCES pages(id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        url TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS images (
+        page_id INTEGER NOT NULL REFERENCES pages(id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        url TEXT NOT NULL,
+        alt TEXT,
+        filename TEXT
+    );
+    CREATE TABLE IF NOT EXISTS table_cells (
+        page_id INTEGER NOT NULL REFERENCES pages(id) ON DELETE CASCADE,
+        table_index INTEGER NOT NULL,
+        row_index INTEGER NOT NULL,
+        col_index INTEGER NOT NULL,
+        value TEXT
+    );
+    CREATE INDEX IF NOT EXISTS links_page ON links (page_id);
+    CREATE INDEX IF NOT EXISTS links_url ON links (url);
+    CREATE INDEX IF NOT EXISTS images_page ON images (page_id);
+    CREATE INDEX IF NOT EXISTS table_cells_page ON table_cells (page_id);
+
+    CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+        title, text, content='pages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    );
+    CREATE TRIGGER IF NOT EXISTS pages_fts_insert AFTER INSERT ON pages BEGIN
+        INSERT INTO pages_fts (rowid, title, text) VALUES (new.id, new.title, new.text);
+    END;
+    CREATE TRIGGER IF NOT EXISTS pages_fts_delete AFTER DELETE ON pages BEGIN
+        INSERT INTO pages_fts (pages_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+    END;
+"""
+
+
+class SQLiteSink(ResultSink):
+    """Writes results into a normalized, full-text indexed SQLite database"""
+
+    def __init__(self, filename: str, append: bool = False, batch_size: int = 500):
+        """
+        Args:
+            filename: Database file
+            append: Keep the existing database; pages scraped again replace
+                their earlier rows. Without append the file is recreated.
+            batch_size: Results written per transaction
+        """
+        super().__init__(filename)
+        if not append:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(filename + suffix):
+                    os.remove(filename + suffix)
+        self.batch_size = batch_size
+        self._pending = {}
+        self._db = sqlite3.connect(filename, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('PRAGMA foreign_keys=ON')
+        self._db.executescript(SCHEMA)
+
+    def write(self, record: Dict[str, Any]):
+        # A page seen twice in one batch keeps its latest result
+        self._pending.pop(record['url'], None)
+        self._pending[record['url']] = record
+        self.count += 1
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered results in one transaction"""
+        if not self._pending:
+            return
+        records = list(self._pending.values())
+        self._pending = {}
+
+        # IMMEDIATE takes the write lock up front, so concurrent writers to
+        # the same file never allocate the same page ids
+        self._db.execute('BEGIN IMMEDIATE')
+        try:
+            self._db.executemany('DELETE FROM pages WHERE url = ?', [(r['url'],) for r in records])
+            next_id = self._db.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM pages').fetchone()[0]
+            pages, links, images, cells = [], [], [], []
+            for page_id, record in enumerate(records, next_id):
+                extra = {key: value for key, value in record.items() if key not in STORED_KEYS}
+                pages.append((
+                    page_id, record['url'], record.get('title'), record.get('timestamp'),
+                    '\n'.join(record.get('text') or []),
+                    json.dumps(record['fields'], ensure_ascii=False) if record.get('fields') is not None else None,
+                    json.dumps(extra, ensure_ascii=False) if extra else None
+                ))
+                links.extend((page_id, position, url) for position, url in enumerate(record.get('links') or []))
+                images.extend((page_id, position, image.get('url'), image.get('alt'), image.get('filename'))
+                              for position, image in enumerate(record.get('images') or []))
+                for table_index, rows in enumerate(record.get('tables') or []):
+                    for row_index, row in enumerate(rows):
+                        cells.extend((page_id, table_index, row_index, col_index, value)
+                                     for col_index, value in enumerate(row))
+            self._db.executemany('INSERT INTO pages (id, url, title, timestamp, text, fields, extra) '
+                                 'VALUES (?, ?, ?, ?, ?, ?, ?)', pages)
+            self._db.executemany('INSERT INTO links (page_id, position, url) VALUES (?, ?, ?)', links)
+            self._db.executemany('INSERT INTO images (page_id, position, url, alt, filename) '
+                                 'VALUES (?, ?, ?, ?, ?)', images)
+            self._db.executemany('INSERT INTO table_cells (page_id, table_index, row_index, col_index, value) '
+                                 'VALUES (?, ?, ?, ?, ?)', cells)
+            self._db.execute('COMMIT')
+        except BaseException:
+            self._db.execute('ROLLBACK')
+            raise
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+
+def _page(rows: List[Dict[str, Any]], limit: int, offset: int) -> Dict[str, Any]:
+    """Wrap one page of query rows (fetched with limit + 1) with pagination info"""
+    return {
+        'results': rows[:limit],
+        'offset': offset,
+        'limit': limit,
+        'next_offset': offset + limit if len(rows) > limit else None
+    }
+
+
+class ResultDatabase:
+    """Read-only, paginated queries against a database written by SQLiteSink"""
+
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self._db = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro", uri=True,
+                                   timeout=30, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+
+    @staticmethod
+    def _bounds(limit: int, offset: int):
+        return max(1, min(int(limit), MAX_QUERY_LIMIT)), max(0, int(offset))
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """
+        Full-text search over page titles and text, best matches first
+
+        Args:
+            query: FTS5 query, e.g. 'price AND "free shipping"'
+
+        Raises:
+            ValueError: If the query is not valid FTS5 syntax
+        """
+        limit, offset = self._bounds(limit, offset)
+        try:
+            rows = self._db.execute("""
+                SELECT pages.url, pages.title, pages.timestamp,
+                       snippet(pages_fts, 1, '[', ']', '...', 16) AS snippet
+                FROM pages_fts JOIN pages ON pages.id = pages_fts.rowid
+                WHERE pages_fts MATCH ?
+                ORDER BY pages_fts.rank
+                LIMIT ? OFFSET ?
+            """, (query, limit + 1, offset)).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query: {e}")
+        return _page([dict(row) for row in rows], limit, offset)
+
+    def links_from(self, url: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """Links found on the page url, in page order"""
+        limit, offset = self._bounds(limit, offset)
+        rows = self._db.execute("""
+            SELECT links.url FROM links JOIN pages ON pages.id = links.page_id
+            WHERE pages.url = ? ORDER BY links.position LIMIT ? OFFSET ?
+        """, (url, limit + 1, offset)).fetchall()
+        return _page([dict(row) for row in rows], limit, offset)
+
+    def links_to(self, url: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """Pages that link to url"""
+        limit, offset = self._bounds(limit, offset)
+        rows = self._db.execute("""
+            SELECT pages.url, pages.title FROM pages
+            WHERE pages.id IN (SELECT page_id FROM links WHERE url = ?)
+            ORDER BY pages.id LIMIT ? OFFSET ?
+        """, (url, limit + 1, offset)).fetchall()
+        return _page([dict(row) for row in rows], limit, offset)
+
+    def page(self, url: str) -> Optional[Dict[str, Any]]:
+        """A stored page rebuilt as a result dict, or None"""
+        row = self._db.execute('SELECT * FROM pages WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        result = {'url': row['url'], 'title': row['title'], 'timestamp': row['timestamp']}
+        result['links'] = [r[0] for r in self._db.execute(
+            'SELECT url FROM links WHERE page_id = ? ORDER BY position', (row['id'],))]
+        result['text'] = row['text'].split('\n') if row['text'] else []
+        result['images'] = [{'url': r[0], 'alt': r[1], 'filename': r[2]} for r in self._db.execute(
+            'SELECT url, alt, filename FROM images WHERE page_id = ? ORDER BY position', (row['id'],))]
+        tables = []
+        for table_index, row_index, value in self._db.execute(
+                'SELECT table_index, row_index, value FROM table_cells WHERE page_id = ? '
+                'ORDER BY table_index, row_index, col_index', (row['id'],)):
+            while len(tables) <= table_index:
+                tables.append([])
+            while len(tables[table_index]) <= row_index:
+                tables[table_index].append([])
+            tables[table_index][row_index].append(value)
+        result['tables'] = tables
+        if row['fields'] is not None:
+            result['fields'] = json.loads(row['fields'])
+        if row['extra']:
+            result.update(json.loads(row['extra']))
+        return result
+
+    def close(self):
+        self._db.close()
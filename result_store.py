@@ -0,0 +1,173 @@
+"""
+Server-side store for scrape results
+
+Results are kept as JSON Lines files under a result id, so exports can be
+streamed straight from disk instead of being posted back by the browser.
+On request a result is also indexed in its own SQLite database (see
+result_db.py) for full-text and link search. Old files are removed by a
+TTL- and count-bounded cleanup.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from typing import List, Dict, Any, Iterator, Optional
+
+from sinks import JSONLinesSink
+
+RESULT_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# Search index files of a result, cleaned up like the results themselves
+INDEX_SUFFIXES = ('.sqlite3', '.sqlite3-wal', '.sqlite3-shm')
+
+# Failed pages of a result; not '.jsonl', so they don't count as results in cleanup
+FAILURES_SUFFIX = '.failures.json'
+
+
+def cleanup_directory(directory: str, ttl: float, max_files: int, suffix: str = '') -> int:
+    """
+    Delete files older than ttl, then the oldest files beyond max_files
+
+    Args:
+        directory: Directory to clean
+        ttl: Maximum file age in seconds
+        max_files: Maximum number of files to keep
+        suffix: Only consider files whose name ends with this suffix
+
+    Returns:
+        Number of files deleted
+    """
+    try:
+        entries = [e for e in os.scandir(directory) if e.is_file() and e.name.endswith(suffix)]
+    except FileNotFoundError:
+        return 0
+
+    now = time.time()
+    entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+    deleted = 0
+    for index, entry in enumerate(entries):
+        if index >= max_files or now - entry.stat().st_mtime > ttl:
+            try:
+                os.remove(entry.path)
+                deleted += 1
+            except OSError:
+                pass
+    return deleted
+
+
+class ResultStore:
+    """Keeps scrape results on disk under generated result ids"""
+
+    def __init__(self, directory: str, ttl: float = 3600, max_entries: int = 200, cleanup_interval: float = 60):
+        """
+        Initialize the store
+
+        Args:
+            directory: Directory holding one .jsonl file per result id
+            ttl: Seconds a stored result is kept
+            max_entries: Maximum number of stored results
+            cleanup_interval: Minimum seconds between two cleanup runs
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cleanup_interval = cleanup_interval
+        self._last_cleanup = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, result_id: str) -> Optional[str]:
+        if not RESULT_ID_PATTERN.match(result_id or ''):
+            return None
+        return os.path.join(self.directory, result_id + '.jsonl')
+
+    def new_id(self) -> str:
+        return uuid.uuid4().hex
+
+    def open(self, result_id: str = None) -> JSONLinesSink:
+        """
+        Open a sink that writes results under result_id
+
+        The sink's filename attribute is the path; the id is available as
+        sink.result_id.
+        """
+        self.maybe_cleanup()
+        result_id = result_id or self.new_id()
+        path = self._path(result_id)
+        if path is None:
+            raise ValueError(f"Invalid result id: {result_id}")
+        sink = JSONLinesSink(path)
+        sink.result_id = result_id
+        return sink
+
+    def index_path(self, result_id: str) -> Optional[str]:
+        """Path of the search index of a result, or None for invalid ids"""
+        path = self._path(result_id)
+        return path[:-len('.jsonl')] + '.sqlite3' if path else None
+
+    def open_index(self, result_id: str):
+        """Open a SQLiteSink that indexes results under result_id for search"""
+        # Imported here so app cold starts don't load the database code
+        from result_db import SQLiteSink
+        path = self.index_path(result_id)
+        if path is None:
+            raise ValueError(f"Invalid result id: {result_id}")
+        return SQLiteSink(path)
+
+    def save(self, results: List[Dict[str, Any]]) -> str:
+        """Store a list of results and return its result id"""
+        with self.open() as sink:
+            for result in results:
+                sink.write(result)
+        return sink.result_id
+
+    def save_failures(self, result_id: str, failures: List[Dict[str, Any]]):
+        """Store the failed pages of a result next to it"""
+        path = self._path(result_id)
+        if path is None:
+            raise ValueError(f"Invalid result id: {result_id}")
+        with open(path[:-len('.jsonl')] + FAILURES_SUFFIX, 'w', encoding='utf-8') as f:
+            json.dump(failures, f, ensure_ascii=False)
+
+    def load_failures(self, result_id: str) -> List[Dict[str, Any]]:
+        """Failed pages stored for a result; empty if none were saved"""
+        path = self._path(result_id)
+        if path is None:
+            raise KeyError(result_id)
+        try:
+            with open(path[:-len('.jsonl')] + FAILURES_SUFFIX, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def exists(self, result_id: str) -> bool:
+        path = self._path(result_id)
+        return path is not None and os.path.exists(path)
+
+    def iter_results(self, result_id: str) -> Iterator[Dict[str, Any]]:
+        """Read stored results one at a time"""
+        path = self._path(result_id)
+        if path is None:
+            raise KeyError(result_id)
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def maybe_cleanup(self):
+        """Run cleanup() if cleanup_interval has passed since the last run"""
+        with self._lock:
+            if time.time() - self._last_cleanup < self.cleanup_interval:
+                return
+            self._last_cleanup = time.time()
+        self.cleanup()
+
+    def cleanup(self) -> int:
+        """Delete expired results, failure lists and search indexes, and the oldest ones beyond max_entries"""
+        deleted = cleanup_directory(self.directory, self.ttl, self.max_entries, suffix='.jsonl')
+        for suffix in INDEX_SUFFIXES + (FAILURES_SUFFIX,):
+            deleted += cleanup_directory(self.directory, self.ttl, self.max_entries, suffix=suffix)
+        return deleted
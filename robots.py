@@ -0,0 +1,122 @@
+"""
+robots.txt support for WebScraper
+
+RobotsCache downloads each origin's robots.txt at most once per TTL and
+answers whether a URL may be fetched and which Crawl-delay applies.
+Following RFC 9309, a missing robots.txt (4xx) allows everything, while an
+unreachable one (5xx or a network error) disallows everything until the
+shorter error TTL has passed.
+"""
+
+import math
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+# urllib.robotparser only reads whole-second delays
+FRACTIONAL_DELAY = re.compile(r'^(\s*crawl-delay\s*:\s*)(\d*\.\d+)', re.IGNORECASE)
+
+
+def _round_up_delays(lines: List[str]) -> List[str]:
+    """Round fractional Crawl-delay values up to whole seconds"""
+    return [FRACTIONAL_DELAY.sub(lambda m: m.group(1) + str(math.ceil(float(m.group(2)))), line) for line in lines]
+
+
+class RobotsCache:
+    """Per-origin cache of parsed robots.txt files"""
+
+    def __init__(self, ttl: float = 86400, error_ttl: float = 300, max_crawl_delay: float = 60.0,
+                 max_bytes: int = 512 * 1024):
+        """
+        Args:
+            ttl: Seconds a downloaded robots.txt is used before it is fetched again
+            error_ttl: Seconds an unreachable robots.txt blocks its origin before a retry
+            max_crawl_delay: Upper bound in seconds for a Crawl-delay taken from robots.txt
+            max_bytes: Only the first max_bytes of a robots.txt are parsed
+        """
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.max_crawl_delay = max_crawl_delay
+        self.max_bytes = max_bytes
+        self.fetches = 0
+        self._entries: Dict[str, Tuple[RobotFileParser, float]] = {}
+        self._origin_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _download(self, origin: str, session: requests.Session, timeout: float) -> Tuple[RobotFileParser, float]:
+        parser = RobotFileParser(origin + '/robots.txt')
+        try:
+            response = session.get(origin + '/robots.txt', timeout=timeout, stream=True)
+            try:
+                if response.status_code >= 500:
+                    parser.disallow_all = True
+                    return parser, self.error_ttl
+                if response.status_code >= 400:
+                    parser.allow_all = True
+                    return parser, self.ttl
+                # iter_content wraps stalled or truncated bodies in RequestException
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(chunk_size=16 * 1024):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= self.max_bytes:
+                        break
+                body = b''.join(chunks)[:self.max_bytes]
+            finally:
+                response.close()
+        except requests.exceptions.RequestException as e:
+            print(f"Could not fetch {origin}/robots.txt: {e}")
+            parser.disallow_all = True
+            return parser, self.error_ttl
+
+        parser.parse(_round_up_delays(body.decode('utf-8', errors='replace').splitlines()))
+        parser.modified()
+        return parser, self.ttl
+
+    def rules(self, url: str, session: requests.Session, timeout: float = 10) -> RobotFileParser:
+        """
+        Parsed robots.txt of the origin of url, downloading it if needed
+
+        Concurrent callers for the same origin wait for a single download.
+        """
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}".lower()
+
+        entry = self._entries.get(origin)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+
+        with self._lock:
+            origin_lock = self._origin_locks.setdefault(origin, threading.Lock())
+        with origin_lock:
+            entry = self._entries.get(origin)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+            parser, ttl = self._download(origin, session, timeout)
+            self.fetches += 1
+            self._entries[origin] = (parser, time.monotonic() + ttl)
+            return parser
+
+    def check(self, url: str, session: requests.Session, timeout: float = 10) -> Tuple[bool, Optional[float]]:
+        """
+        Whether url may be fetched with the session's User-Agent
+
+        Returns:
+            Tuple of (allowed, crawl delay in seconds or None)
+        """
+        parser = self.rules(url, session, timeout)
+        agent = session.headers.get('User-Agent') or '*'
+        delay = parser.crawl_delay(agent)
+        if delay is not None:
+            delay = min(float(delay), self.max_crawl_delay)
+        return parser.can_fetch(agent, url), delay
+
+    def sitemaps(self, url: str, session: requests.Session, timeout: float = 10) -> List[str]:
+        """Sitemap URLs listed in the robots.txt of the origin of url"""
+        return self.rules(url, session, timeout).site_maps() or []
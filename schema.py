@@ -0,0 +1,196 @@
+"""
+Declarative extraction schemas
+
+A schema maps field names to CSS selectors plus optional post-processing:
+
+    price:
+      selector: .product .price
+      regex: '([\\d.]+)'
+      type: float
+    author: .byline a            # shorthand for {'selector': '.byline a'}
+    tags:
+      selector: .tags a
+      many: true
+    image:
+      selector: img.main
+      attr: src
+      type: url
+
+compile_schema() turns a schema into an ExtractionPlan once, with every CSS
+selector and regex precompiled, and the plan is then applied to each page.
+Schemas can be loaded from JSON or, when PyYAML is installed, YAML files.
+"""
+
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Any, Optional, Union
+from urllib.parse import urljoin
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+FIELD_KEYS = frozenset(['selector', 'attr', 'regex', 'type', 'many', 'default'])
+FIELD_TYPES = ('str', 'int', 'float', 'url')
+
+
+class SchemaError(ValueError):
+    """Raised for schemas that cannot be compiled"""
+
+
+@lru_cache(maxsize=256)
+def compile_selector(selector: str) -> soupsieve.SoupSieve:
+    """Compile a CSS selector, reusing earlier compilations of the same string"""
+    return soupsieve.compile(selector)
+
+
+class FieldPlan:
+    """Compiled extraction rule of one schema field"""
+
+    def __init__(self, name: str, spec: Union[str, Dict[str, Any]]):
+        if isinstance(spec, str):
+            spec = {'selector': spec}
+        if not isinstance(spec, dict):
+            raise SchemaError(f"Field '{name}' must be a selector string or a mapping")
+        unknown = set(spec) - FIELD_KEYS
+        if unknown:
+            raise SchemaError(f"Field '{name}' has unknown keys: {', '.join(sorted(unknown))}")
+        for key in ('selector', 'attr', 'regex', 'type'):
+            if spec.get(key) is not None and not isinstance(spec[key], str):
+                raise SchemaError(f"Field '{name}' has a non-string {key}")
+        if not spec.get('selector'):
+            raise SchemaError(f"Field '{name}' needs a selector")
+
+        self.name = name
+        self.attr = spec.get('attr') or 'text'
+        self.type = spec.get('type') or 'str'
+        self.many = bool(spec.get('many', False))
+        self.default = spec.get('default', [] if self.many else None)
+        if self.type not in FIELD_TYPES:
+            raise SchemaError(f"Field '{name}' has unknown type '{self.type}'")
+        try:
+            self.selector = compile_selector(spec['selector'])
+        except Exception as e:
+            raise SchemaError(f"Field '{name}' has an invalid selector: {e}")
+        try:
+            self.regex = re.compile(spec['regex']) if spec.get('regex') else None
+        except Exception as e:
+            raise SchemaError(f"Field '{name}' has an invalid regex: {e}")
+
+    def value(self, element, base_url: str) -> Optional[Any]:
+        """Post-processed value of one matched element, or None"""
+        if self.attr == 'text':
+            raw = element.get_text(strip=True)
+        else:
+            raw = element.get(self.attr)
+            if isinstance(raw, list):
+                # Multi-valued attributes such as class
+                raw = ' '.join(raw)
+        if raw is None:
+            return None
+
+        if self.regex is not None:
+            match = self.regex.search(raw)
+            if match is None:
+                return None
+            raw = match.group(1) if self.regex.groups else match.group(0)
+            if raw is None:
+                # An optional group that took no part in the match
+                return None
+
+        if self.type == 'int':
+            try:
+                return int(raw.strip())
+            except ValueError:
+                return None
+        if self.type == 'float':
+            try:
+                return float(raw.strip())
+            except ValueError:
+                return None
+        if self.type == 'url':
+            return urljoin(base_url, raw.strip())
+        return raw
+
+    def apply(self, soup: BeautifulSoup, base_url: str) -> Any:
+        if not self.many:
+            element = self.selector.select_one(soup)
+            value = self.value(element, base_url) if element is not None else None
+            return self.default if value is None else value
+
+        values = []
+        for element in self.selector.select(soup):
+            value = self.value(element, base_url)
+            if value is not None:
+                values.append(value)
+        return values or self.default
+
+
+class ExtractionPlan:
+    """A compiled schema, applied to each parsed page"""
+
+    def __init__(self, schema: Dict[str, Any]):
+        if not isinstance(schema, dict) or not schema:
+            raise SchemaError('A schema must be a non-empty mapping of field names to selectors')
+        self.schema = schema
+        self.fields = [FieldPlan(name, spec) for name, spec in schema.items()]
+
+    def apply(self, soup: BeautifulSoup, base_url: str = '') -> Dict[str, Any]:
+        """Extract every field from a parsed page"""
+        return {field.name: field.apply(soup, base_url) for field in self.fields}
+
+    def __reduce__(self):
+        # Parse workers recompile from the schema (once per process, see compile_schema)
+        return compile_schema, (self.schema,)
+
+
+@lru_cache(maxsize=64)
+def _compile_cached(key: str) -> ExtractionPlan:
+    return ExtractionPlan(json.loads(key))
+
+
+def compile_schema(schema: Union[Dict[str, Any], ExtractionPlan]) -> ExtractionPlan:
+    """
+    Compile a schema into an ExtractionPlan
+
+    Compiled plans are cached by schema content, so passing the same schema
+    again is cheap; passing a plan returns it unchanged.
+
+    Raises:
+        SchemaError: If the schema is malformed
+    """
+    if isinstance(schema, ExtractionPlan):
+        return schema
+    try:
+        key = json.dumps(schema)
+    except (TypeError, ValueError) as e:
+        raise SchemaError(f"Schema is not JSON compatible: {e}")
+    return _compile_cached(key)
+
+
+def load_schema(path: str) -> Dict[str, Any]:
+    """
+    Read a schema from a JSON or YAML file
+
+    Files ending in .yaml or .yml are read as YAML (requires PyYAML),
+    everything else as JSON.
+
+    Raises:
+        SchemaError: If a YAML file cannot be parsed (invalid JSON raises
+            json.JSONDecodeError, also a ValueError)
+    """
+    with open(path, encoding='utf-8') as f:
+        if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+            if yaml is None:
+                raise SchemaError('PyYAML is required for YAML schemas (pip install pyyaml)')
+            try:
+                return yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                raise SchemaError(f"Invalid YAML: {e}")
+        return json.load(f)
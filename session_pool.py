@@ -0,0 +1,133 @@
+"""
+Shared HTTP sessions
+
+create_session() builds the requests.Session every WebScraper uses.
+SessionPool keeps a bounded set of such sessions alive across Flask requests
+so TCP/TLS connections to the same sites are reused instead of being
+re-established for every /api/scrape call.
+"""
+
+import threading
+from collections import OrderedDict
+from http.cookiejar import CookiePolicy
+from typing import Dict, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from instrumentation import timed_connection_class
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools record how long connection setup takes"""
+
+    def _instrument(self, pool):
+        if not getattr(pool, '_connect_timed', False):
+            pool.ConnectionCls = timed_connection_class(pool.ConnectionCls)
+            pool._connect_timed = True
+        return pool
+
+    def get_connection(self, url, proxies=None):
+        return self._instrument(super().get_connection(url, proxies))
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        # Used instead of get_connection by newer requests releases
+        return self._instrument(super().get_connection_with_tls_context(request, verify, proxies, cert))
+
+
+class BlockAllCookies(CookiePolicy):
+    """Cookie policy that neither stores nor sends cookies"""
+    netscape = True
+    rfc2965 = hide_cookie2 = False
+
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+    def domain_return_ok(self, domain, request):
+        return False
+
+    def path_return_ok(self, path, request):
+        return False
+
+
+def create_session(headers: Dict[str, str] = None, pool_connections: int = 10,
+                   pool_maxsize: int = 10) -> requests.Session:
+    """
+    Create a session with the scraper's default headers and sized connection pools
+
+    Args:
+        headers: Headers to send with every request (default: DEFAULT_HEADERS)
+        pool_connections: Number of hosts whose connection pools are kept
+        pool_maxsize: Connections kept per host
+
+    Returns:
+        Configured requests.Session
+    """
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS if headers is None else headers)
+
+    # The timed adapter lets instrumentation separate connect time from TTFB
+    adapter = TimedHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class SessionPool:
+    """Process-wide, thread-safe cache of sessions keyed by their default headers"""
+
+    def __init__(self, max_sessions: int = 8, pool_connections: int = 50, pool_maxsize: int = 16):
+        """
+        Args:
+            max_sessions: Sessions kept alive; the least recently used one is closed beyond this
+            pool_connections: Hosts whose connections each session keeps
+            pool_maxsize: Connections each session keeps per host
+        """
+        self.max_sessions = max_sessions
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, headers: Dict[str, str]) -> Tuple:
+        return tuple(sorted((DEFAULT_HEADERS if headers is None else headers).items()))
+
+    def get(self, headers: Dict[str, str] = None) -> requests.Session:
+        """
+        Return the shared session for a set of default headers
+
+        Timeouts are passed per request, so scrapers with different timeouts
+        share a session. Shared sessions don't keep cookies, so one caller's
+        cookies never leak into another caller's requests.
+        """
+        key = self._key(headers)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+                return session
+
+            session = create_session(headers, self.pool_connections, self.pool_maxsize)
+            session.cookies.set_policy(BlockAllCookies())
+            self._sessions[key] = session
+            while len(self._sessions) > self.max_sessions:
+                _, evicted = self._sessions.popitem(last=False)
+                evicted.close()
+            return session
+
+    def close(self):
+        """Close every pooled session"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -0,0 +1,155 @@
+"""
+Streaming result sinks
+
+Each sink writes and flushes a record as soon as it is handed over, so
+memory stays flat for large jobs and finished pages survive a crash.
+"""
+
+import csv
+import io
+import json
+import os
+from typing import Dict, Any, Iterable, Iterator
+
+CSV_FIELDS = ['url', 'title', 'timestamp', 'num_links', 'num_images', 'num_tables', 'text_preview']
+
+
+def flatten_result(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a result dict into one CSV row"""
+    return {
+        'url': item.get('url', ''),
+        'title': item.get('title', ''),
+        'timestamp': item.get('timestamp', ''),
+        'num_links': len(item.get('links', [])),
+        'num_images': len(item.get('images', [])),
+        'num_tables': len(item.get('tables', [])),
+        'text_preview': ' '.join(item.get('text', []))[:200] + '...' if item.get('text') else ''
+    }
+
+
+def format_json_item(record: Dict[str, Any]) -> str:
+    """Format a record as an element of an indent=2 JSON array"""
+    return json.dumps(record, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+
+
+def iter_json_array(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Yield the text of json.dumps(records, indent=2) piece by piece"""
+    empty = True
+    for record in records:
+        yield ('[\n  ' if empty else ',\n  ') + format_json_item(record)
+        empty = False
+    yield '[]' if empty else '\n]'
+
+
+def iter_csv_rows(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Yield the flattened CSV export of records one line at a time, header first"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for record in records:
+        writer.writerow(flatten_result(record))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only when there were no records
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class ResultSink:
+    """Base class for objects that receive scrape results one at a time"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.count = 0
+
+    def write(self, record: Dict[str, Any]):
+        """Write one result record"""
+        raise NotImplementedError
+
+    def close(self):
+        """Finish the output"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class JSONLinesSink(ResultSink):
+    """Writes one JSON document per line"""
+
+    def __init__(self, filename: str, append: bool = False):
+        super().__init__(filename)
+        self._file = open(filename, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write('\n')
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+
+class CSVSink(ResultSink):
+    """Writes one flattened CSV row per result"""
+
+    def __init__(self, filename: str, append: bool = False):
+        super().__init__(filename)
+        has_header = append and os.path.exists(filename) and os.path.getsize(filename) > 0
+        self._file = open(filename, 'a' if append else 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=CSV_FIELDS)
+        if not has_header:
+            self._writer.writeheader()
+
+    def write(self, record: Dict[str, Any]):
+        self._writer.writerow(flatten_result(record))
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+
+class JSONSink(ResultSink):
+    """
+    Writes a pretty-printed JSON array incrementally
+
+    The finished file is identical to json.dump(records, f, indent=2). If the
+    job dies part way the array is left unterminated but every completed
+    record is already on disk.
+    """
+
+    def __init__(self, filename: str):
+        super().__init__(filename)
+        self._file = open(filename, 'w', encoding='utf-8')
+
+    def write(self, record: Dict[str, Any]):
+        self._file.write('[\n  ' if self.count == 0 else ',\n  ')
+        self._file.write(format_json_item(record))
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        self._file.write('\n]' if self.count else '[]')
+        self._file.close()
+
+
+class TeeSink(ResultSink):
+    """Hands every result to several sinks; named after the first one"""
+
+    def __init__(self, *sinks: ResultSink):
+        super().__init__(sinks[0].filename)
+        self.sinks = sinks
+
+    def write(self, record: Dict[str, Any]):
+        for sink in self.sinks:
+            sink.write(record)
+        self.count += 1
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
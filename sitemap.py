@@ -0,0 +1,155 @@
+"""
+Streaming sitemap reader
+
+iter_sitemap_urls() yields the page URLs of sitemaps, sitemap indexes and
+gzip-compressed (.xml.gz) sitemaps. Each document is first streamed to a
+temporary file (gunzipped on the way) so the connection is not held open
+while pages are scraped, then read back with iterparse, discarding every
+finished entry right away. A sitemap with millions of URLs can thus feed
+WebScraper.iter_scrape without ever being held in memory.
+"""
+
+import tempfile
+import xml.etree.ElementTree as ET
+import zlib
+from typing import BinaryIO, Iterable, Iterator, List, Set, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from robots import RobotsCache
+
+# Longest chain of sitemap indexes followed
+MAX_SITEMAP_DEPTH = 3
+
+# Largest (uncompressed) sitemap document read; the protocol allows 50 MB
+MAX_SITEMAP_BYTES = 200 * 1024 * 1024
+
+
+def _local_name(tag: str) -> str:
+    """Tag name without its XML namespace"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def download_sitemap(url: str, session: requests.Session, timeout: float = 10) -> BinaryIO:
+    """
+    Download a sitemap document into a temporary file
+
+    Gzip-compressed documents are decompressed while they stream in.
+
+    Returns:
+        The uncompressed XML in a temporary file, positioned at its start
+
+    Raises:
+        ValueError: If the document is larger than MAX_SITEMAP_BYTES
+    """
+    target = tempfile.TemporaryFile()
+    try:
+        with session.get(url, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            decompressor = None
+            first = True
+            # iter_content undoes any Content-Encoding; .gz payloads are handled here
+            for chunk in response.iter_content(64 * 1024):
+                if first and chunk:
+                    first = False
+                    if chunk[:2] == b'\x1f\x8b':
+                        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                target.write(decompressor.decompress(chunk) if decompressor else chunk)
+                if target.tell() > MAX_SITEMAP_BYTES:
+                    raise ValueError(f"Sitemap larger than {MAX_SITEMAP_BYTES // (1024 * 1024)} MB")
+        target.seek(0)
+        return target
+    except BaseException:
+        target.close()
+        raise
+
+
+def iter_sitemap_entries(source: BinaryIO) -> Iterator[Tuple[str, str]]:
+    """
+    Parse a sitemap document incrementally
+
+    Args:
+        source: File holding the uncompressed document
+
+    Yields:
+        ('url', loc) for page entries and ('sitemap', loc) for the entries
+        of a sitemap index
+    """
+    root = None
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if root is None:
+            root = elem
+            continue
+        if event != 'end':
+            continue
+        name = _local_name(elem.tag)
+        if name in ('url', 'sitemap'):
+            for child in elem:
+                if _local_name(child.tag) == 'loc' and child.text and child.text.strip():
+                    yield name, child.text.strip()
+                    break
+            # Drop finished entries so memory stays flat
+            root.clear()
+
+
+def iter_sitemap_urls(sitemaps: Iterable[str], session: requests.Session, timeout: float = 10,
+                      rate_limiter=None) -> Iterator[str]:
+    """
+    Stream the page URLs listed in sitemaps, following sitemap indexes
+
+    Args:
+        sitemaps: Sitemap or sitemap index URLs
+        session: Session used for the downloads
+        timeout: Request timeout in seconds
+        rate_limiter: Optional HostRateLimiter consulted before each download
+
+    Yields:
+        Page URLs in document order
+    """
+    seen: Set[str] = set()
+    pending: List[tuple] = [(url, 0) for url in reversed(list(sitemaps))]
+    while pending:
+        url, depth = pending.pop()
+        if url in seen:
+            continue
+        seen.add(url)
+
+        if rate_limiter is not None:
+            rate_limiter.wait(url)
+        print(f"Reading sitemap: {url}")
+        children = []
+        try:
+            with download_sitemap(url, session, timeout) as document:
+                for kind, loc in iter_sitemap_entries(document):
+                    if kind == 'url':
+                        yield loc
+                    elif depth < MAX_SITEMAP_DEPTH:
+                        # Index entries are few (at most 50,000), so collect them
+                        # and read the child sitemaps after this one
+                        children.append(loc)
+        except (requests.exceptions.RequestException, ET.ParseError, zlib.error, ValueError) as e:
+            print(f"Error reading sitemap {url}: {e}")
+        pending.extend((child, depth + 1) for child in reversed(children))
+
+
+def is_sitemap_url(url: str) -> bool:
+    """Whether url points at a sitemap document rather than a site"""
+    return urlsplit(url).path.lower().endswith(('.xml', '.xml.gz', '.gz'))
+
+
+def find_sitemaps(site: str, session: requests.Session, robots: RobotsCache = None, timeout: float = 10) -> List[str]:
+    """
+    Sitemaps of a site: those listed in its robots.txt, else /sitemap.xml
+
+    Args:
+        site: Any URL of the site
+        session: Session used to download robots.txt
+        robots: Cache to read robots.txt from (a temporary one if omitted)
+        timeout: Request timeout in seconds
+    """
+    listed = (robots or RobotsCache()).sitemaps(site, session, timeout)
+    if listed:
+        return listed
+    parts = urlsplit(site)
+    return [f"{parts.scheme}://{parts.netloc}/sitemap.xml"]
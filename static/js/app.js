@@ -12,6 +12,7 @@ document.addEventListener('DOMContentLoaded', function() {
     const tabContents = document.querySelectorAll('.tab-content');
     const exportJsonBtn = document.getElementById('exportJson');
     const exportCsvBtn = document.getElementById('exportCsv');
+    let currentResultId = null;
 
     // Close alert buttons
     document.querySelectorAll('.close-btn').forEach(btn => {
@@ -51,6 +52,7 @@ document.addEventListener('DOMContentLoaded', function() {
         resultsContainer.style.display = 'none';
         successAlert.style.display = 'none';
         errorAlert.style.display = 'none';
+        currentResultId = null;
         
         // Get form data
         const formData = {
@@ -67,25 +69,24 @@ document.addEventListener('DOMContentLoaded', function() {
         };
 
         try {
-            // Call backend API
-            const response = await fetch('/api/scrape', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(formData)
-            });
-
-            const data = await response.json();
+            let results;
+            try {
+                results = await scrapeWithJob(formData);
+            } catch (error) {
+                if (!error.fallback) {
+                    throw error;
+                }
+                // Serverless deployments cannot run background jobs; only a
+                // job that was never accepted is retried, so no site is fetched twice
+                console.warn('Background job unavailable, scraping directly:', error.message);
+                results = await scrapeDirect(formData);
+            }
             
-            if (!response.ok) {
-                throw new Error(data.error || 'Failed to scrape');
+            if (results.length === 0) {
+                throw new Error('No data was scraped successfully');
             }
             
-            // Display results
-            displayResults(data);
             successAlert.style.display = 'flex';
-            resultsContainer.style.display = 'block';
             
         } catch (error) {
             console.error('Scraping error:', error);
@@ -96,15 +97,112 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
-    // Export buttons
+    // Error that makes the form retry through /api/scrape
+    function fallbackError(message) {
+        const error = new Error(message);
+        error.fallback = true;
+        return error;
+    }
+
+    // Submit a background job; pages are pushed back as they complete
+    async function scrapeWithJob(formData) {
+        let response;
+        try {
+            response = await fetch('/api/jobs', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify(formData)
+            });
+        } catch (error) {
+            throw fallbackError(error.message);
+        }
+        
+        const job = await response.json().catch(() => ({}));
+        
+        if (response.status === 501 || response.status >= 502) {
+            throw fallbackError(job.error || 'Background jobs are not available');
+        }
+        if (!response.ok) {
+            throw new Error(job.error || 'Failed to scrape');
+        }
+        
+        return streamJob(job.job_id);
+    }
+
+    // Scrape in a single request, for deployments without background jobs
+    async function scrapeDirect(formData) {
+        const response = await fetch('/api/scrape', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(formData)
+        });
+        
+        const data = await response.json();
+        
+        if (!response.ok) {
+            throw new Error(data.error || 'Failed to scrape');
+        }
+        
+        currentResultId = response.headers.get('X-Result-Id');
+        displayResults(data);
+        resultsContainer.style.display = 'block';
+        return data;
+    }
+
+    // Follow a job's Server-Sent Events stream, rendering each page as it arrives
+    function streamJob(jobId) {
+        return new Promise((resolve, reject) => {
+            const results = [];
+            const source = new EventSource(`/api/jobs/${jobId}/stream`);
+
+            source.addEventListener('page', function(event) {
+                results.push(JSON.parse(event.data));
+                displayResults(results);
+                resultsContainer.style.display = 'block';
+            });
+
+            source.addEventListener('done', function(event) {
+                source.close();
+                const status = JSON.parse(event.data);
+                currentResultId = status.result_id;
+                if (status.status === 'failed') {
+                    reject(new Error(status.error || 'Scraping failed'));
+                } else {
+                    resolve(results);
+                }
+            });
+
+            source.onerror = function() {
+                // EventSource reconnects by itself while the job is still known.
+                // The job keeps running on the server, so this is not retried
+                // through /api/scrape.
+                if (source.readyState === EventSource.CLOSED) {
+                    reject(new Error('Lost connection to the server'));
+                }
+            };
+        });
+    }
+
+    // Export buttons download the results stored on the server
+    function exportResults(format) {
+        if (!currentResultId) {
+            errorMessage.textContent = 'No results to export yet';
+            errorAlert.style.display = 'flex';
+            return;
+        }
+        window.location.href = `/api/results/${currentResultId}/export/${format}`;
+    }
+
     exportJsonBtn.addEventListener('click', function() {
-        // In a real implementation, this would download the JSON file
-        alert('JSON export functionality would be implemented here');
+        exportResults('json');
     });
 
     exportCsvBtn.addEventListener('click', function() {
-        // In a real implementation, this would download the CSV file
-        alert('CSV export functionality would be implemented here');
+        exportResults('csv');
     });
 
     // Function to display results
@@ -0,0 +1,126 @@
+import json
+import os
+import random
+import unittest
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+from extractor import extract_page, make_soup
+
+BASE_URL = 'http://example.com/dir/'
+
+FULL_CONFIG = {'extract_links': True, 'extract_text': True, 'extract_images': True, 'extract_tables': True}
+
+
+# The find_all-based extraction extract_page replaced; its output is the reference
+def reference_links(soup, base_url):
+    return [urljoin(base_url, link['href']) for link in soup.find_all('a', href=True)]
+
+
+def reference_text(soup):
+    elements = soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+    return [elem.get_text(strip=True) for elem in elements if elem.get_text(strip=True)]
+
+
+def reference_images(soup, base_url):
+    images = []
+    for img in soup.find_all('img'):
+        src = img.get('src')
+        if src:
+            full_url = urljoin(base_url, src)
+            images.append({'url': full_url, 'alt': img.get('alt', ''),
+                           'filename': os.path.basename(urlparse(full_url).path)})
+    return images
+
+
+def reference_tables(soup):
+    tables_data = []
+    for table in soup.find_all('table'):
+        table_data = []
+        for row in table.find_all('tr'):
+            row_data = [cell.get_text(strip=True) for cell in row.find_all(['td', 'th'])]
+            if row_data:
+                table_data.append(row_data)
+        if table_data:
+            tables_data.append(table_data)
+    return tables_data
+
+
+def reference_page(html, base_url=BASE_URL):
+    soup = BeautifulSoup(html, 'html.parser')
+    return {
+        'links': reference_links(soup, base_url),
+        'text': reference_text(soup),
+        'images': reference_images(soup, base_url),
+        'tables': reference_tables(soup)
+    }
+
+
+TAGS = ['p', 'h1', 'h3', 'div', 'span', 'a', 'img', 'table', 'tr', 'td', 'th', 'tbody', 'b', 'li']
+
+
+def random_markup(rng, depth=0):
+    """Random, often malformed markup: unclosed and stray closing tags, empty attributes"""
+    parts = []
+    for _ in range(rng.randint(0, 5)):
+        choice = rng.random()
+        if choice < 0.3:
+            parts.append(rng.choice(['hi', ' ', 'x y', '', '&amp;', '<!-- c -->']))
+        elif choice < 0.4:
+            parts.append(f"</{rng.choice(TAGS)}>")
+        else:
+            tag = rng.choice(TAGS)
+            attrs = ''
+            if tag == 'a' and rng.random() < 0.8:
+                attrs = ' href="%s"' % rng.choice(['', '/x', 'http://other/y#f', '?q=1'])
+            elif tag == 'img':
+                attrs = ' src="%s" alt="a"' % rng.choice(['', 'i/p.png'])
+            inner = random_markup(rng, depth + 1) if depth < 5 else 'z'
+            parts.append(f"<{tag}{attrs}>{inner}" + (f"</{tag}>" if rng.random() < 0.8 else ''))
+    return ''.join(parts)
+
+
+class ExtractPageTest(unittest.TestCase):
+
+    def assert_matches_reference(self, html):
+        expected = reference_page(html)
+        actual = extract_page(make_soup(html.encode('utf-8'), FULL_CONFIG), BASE_URL, FULL_CONFIG)
+        # Compared as JSON so key order and list/str types have to match as well
+        self.assertEqual(json.dumps(actual), json.dumps(expected), html)
+
+        strained = extract_page(make_soup(html.encode('utf-8'), FULL_CONFIG, strain=True), BASE_URL, FULL_CONFIG)
+        self.assertEqual(strained['links'], expected['links'], html)
+        self.assertEqual(strained['images'], expected['images'], html)
+
+    def test_nested_tables(self):
+        self.assert_matches_reference(
+            '<table><tr><td>a</td><td><table><tr><td>inner</td><th>h</th></tr></table></td></tr>'
+            '<tr><td>b</td></tr></table>'
+        )
+
+    def test_orphan_cells_and_rows(self):
+        self.assert_matches_reference('<td>no row</td><tr><td>no table</td></tr><table><td>no tr</td></table>')
+
+    def test_empty_href(self):
+        self.assert_matches_reference('<a href="">self</a><a>no href</a><a href="/x">x</a>')
+
+    def test_paragraph_inside_link(self):
+        self.assert_matches_reference('<a href="/p"><p>inside <b>link</b></p></a><p><a href="q">a</a> p</p>')
+
+    def test_empty_title(self):
+        self.assert_matches_reference('<html><head><title></title></head><body><h1> </h1><p>x</p></body></html>')
+
+    def test_images(self):
+        self.assert_matches_reference('<img src="i/p.png"><img src="" alt="none"><img alt="no src">'
+                                      '<img src="http://cdn/x/y.jpg?s=1" alt="a">')
+
+    def test_random_documents(self):
+        for seed in range(500):
+            rng = random.Random(seed)
+            self.assert_matches_reference(
+                '<html><head><title>t</title></head><body>' + random_markup(rng) + '</body></html>')
+
+
+if __name__ == '__main__':
+    unittest.main()
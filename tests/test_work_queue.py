@@ -0,0 +1,64 @@
+import os
+import tempfile
+import time
+import unittest
+
+from work_queue import SQLiteWorkQueue
+
+URL = 'http://example.com/page'
+
+
+class SQLiteWorkQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.queue = SQLiteWorkQueue(os.path.join(self.directory.name, 'queue.sqlite3'), shards=4, max_attempts=2)
+        self.queue.put([URL])
+        self.shard = self.queue.claim_shard('a', 60)
+
+    def tearDown(self):
+        self.queue.close()
+        self.directory.cleanup()
+
+    def expire(self, worker):
+        """Lease the task to worker with a lease that is already over"""
+        tasks = self.queue.lease(worker, self.shard, 10, 0.01)
+        time.sleep(0.02)
+        return tasks
+
+    def test_expired_lease_is_leased_again(self):
+        [(task_id, url)] = self.expire('a')
+        self.assertEqual(url, URL)
+        self.assertEqual(self.queue.lease('b', self.shard, 10, 60), [(task_id, URL)])
+        self.assertEqual(self.queue.lease('c', self.shard, 10, 60), [])
+
+    def test_live_lease_is_not_leased_again(self):
+        self.assertEqual(len(self.queue.lease('a', self.shard, 10, 60)), 1)
+        self.assertEqual(self.queue.lease('b', self.shard, 10, 60), [])
+
+    def test_ack_of_stale_owner_is_ignored(self):
+        [(task_id, _)] = self.expire('a')
+        self.queue.lease('b', self.shard, 10, 60)
+        self.assertEqual(self.queue.ack('a', [task_id]), 0)
+        self.assertEqual(self.queue.progress()['leased'], 1)
+        self.assertEqual(self.queue.ack('b', [task_id]), 1)
+        progress = self.queue.progress()
+        self.assertEqual((progress['done'], progress['workers']), (1, {'b': 1}))
+
+    def test_task_fails_once_attempts_run_out(self):
+        self.expire('a')
+        self.expire('b')
+        self.assertEqual(self.queue.lease('c', self.shard, 10, 60), [])
+        progress = self.queue.progress()
+        self.assertEqual((progress['failed'], progress['leased'], progress['pending']), (1, 0, 0))
+        self.assertEqual(self.queue.requeue_failed(), 1)
+        self.assertEqual(len(self.queue.lease('c', self.shard, 10, 60)), 1)
+
+    def test_put_skips_malformed_urls(self):
+        added = self.queue.put(['http://[abc/x', 'http://example.com/other', '', URL])
+        self.assertEqual((added, self.queue.skipped), (1, 1))
+        self.assertEqual(self.queue.progress()['total'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,305 @@
+"""
+Durable, sharded work queue for scraping with many processes or machines
+
+URLs are spread over a fixed number of shards by a hash of their host, and
+a shard is owned by one worker at a time, so every host is only fetched by
+one worker and its HostRateLimiter keeps politeness intact. Workers lease
+batches of URLs for a visibility timeout and ack them when done. Workers
+renew their leases with heartbeat() only while they make progress, so the
+leases of a worker that crashed or hangs expire and the URLs are handed out
+again, up to max_attempts times.
+
+WorkQueue is the interface; SQLiteWorkQueue stores the queue in one SQLite
+file that any number of local processes can share. Other backends can be
+added with register_backend() and are picked by open_queue() from the URL
+scheme of the queue spec.
+"""
+
+import itertools
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Any, List, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_SHARDS = 64
+
+
+def shard_for(url: str, shards: int) -> int:
+    """Shard of a URL: a stable hash of its host, so all URLs of a host share a shard"""
+    host = (urlsplit(url).hostname or '').lower()
+    return zlib.crc32(host.encode('utf-8')) % shards
+
+
+class WorkQueue:
+    """Interface of work queue backends"""
+
+    # Malformed URLs put() has dropped so far
+    skipped = 0
+
+    def put(self, urls: Iterable[str]) -> int:
+        """Enqueue URLs, ignoring ones already queued or malformed; returns the number added"""
+        raise NotImplementedError
+
+    def claim_shard(self, worker: str, duration: float) -> Optional[int]:
+        """Take ownership of a shard that has work, or return None if there is none"""
+        raise NotImplementedError
+
+    def release_shard(self, worker: str, shard: int):
+        """Give up ownership of a shard"""
+        raise NotImplementedError
+
+    def lease(self, worker: str, shard: int, limit: int, duration: float) -> List[Tuple[int, str]]:
+        """Lease up to limit URLs of a shard for duration seconds; returns (task id, URL) pairs"""
+        raise NotImplementedError
+
+    def heartbeat(self, worker: str, duration: float):
+        """
+        Extend all leases (tasks and shards) of a worker by duration seconds
+
+        Only call this while the worker is making progress; renewing the
+        leases of a hung worker would keep its URLs from everyone else.
+        """
+        raise NotImplementedError
+
+    def ack(self, worker: str, task_ids: Iterable[int]) -> int:
+        """Mark leased tasks done; returns how many were still leased by worker"""
+        raise NotImplementedError
+
+    def fail(self, worker: str, failures: Iterable[Tuple[int, str]]):
+        """Mark leased tasks failed, given (task id, error) pairs"""
+        raise NotImplementedError
+
+    def requeue_failed(self) -> int:
+        """Put failed tasks back in the queue; returns how many"""
+        raise NotImplementedError
+
+    def progress(self) -> Dict[str, Any]:
+        """Task counts by status, plus finished tasks per worker"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release the backend's resources"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """WorkQueue in a SQLite file shared by local processes"""
+
+    def __init__(self, path: str, shards: int = DEFAULT_SHARDS, max_attempts: int = 3):
+        """
+        Open (or create) a queue file
+
+        Args:
+            path: SQLite file of the queue
+            shards: Number of shards of a new queue; an existing queue keeps its own
+            max_attempts: Leases a task may get before it is marked failed
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                shard INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                owner TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS tasks_shard ON tasks (shard, status, lease_until);
+            CREATE INDEX IF NOT EXISTS tasks_owner ON tasks (owner, status);
+            CREATE TABLE IF NOT EXISTS shards (
+                shard INTEGER PRIMARY KEY,
+                owner TEXT,
+                lease_until REAL
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+        with self._transaction():
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'shards'").fetchone()
+            if row is None:
+                self._db.execute("INSERT INTO meta (key, value) VALUES ('shards', ?)", (str(shards),))
+                self._db.executemany('INSERT INTO shards (shard) VALUES (?)', [(i,) for i in range(shards)])
+            self.shards = int(row[0]) if row else shards
+
+    def _transaction(self):
+        return _Transaction(self._db, self._lock)
+
+    def put(self, urls: Iterable[str]) -> int:
+        added = 0
+        urls = iter(urls)
+        while True:
+            chunk = list(itertools.islice(urls, 10000))
+            if not chunk:
+                return added
+            rows = []
+            now = time.time()
+            for url in chunk:
+                if not url:
+                    continue
+                try:
+                    rows.append((url, shard_for(url, self.shards), now))
+                except ValueError:
+                    # e.g. http://[abc/x; one bad line must not abort the rest of a URL file
+                    self.skipped += 1
+            with self._transaction():
+                before = self._db.total_changes
+                self._db.executemany('INSERT OR IGNORE INTO tasks (url, shard, updated_at) VALUES (?, ?, ?)', rows)
+                added += self._db.total_changes - before
+
+    def claim_shard(self, worker: str, duration: float) -> Optional[int]:
+        now = time.time()
+        with self._transaction():
+            row = self._db.execute("""
+                SELECT shard FROM shards
+                WHERE (owner IS NULL OR owner = ? OR lease_until < ?)
+                  AND (EXISTS (SELECT 1 FROM tasks WHERE tasks.shard = shards.shard AND status = 'pending')
+                       OR EXISTS (SELECT 1 FROM tasks WHERE tasks.shard = shards.shard
+                                  AND status = 'leased' AND lease_until < ?))
+                ORDER BY owner = ? DESC, shard
+                LIMIT 1
+            """, (worker, now, now, worker)).fetchone()
+            if row is None:
+                return None
+            self._db.execute('UPDATE shards SET owner = ?, lease_until = ? WHERE shard = ?',
+                             (worker, now + duration, row[0]))
+            return row[0]
+
+    def release_shard(self, worker: str, shard: int):
+        with self._transaction():
+            self._db.execute('UPDATE shards SET owner = NULL, lease_until = NULL WHERE shard = ? AND owner = ?',
+                             (shard, worker))
+
+    def lease(self, worker: str, shard: int, limit: int, duration: float) -> List[Tuple[int, str]]:
+        now = time.time()
+        with self._transaction():
+            # Tasks whose leases keep expiring (e.g. they crash the worker) are given up on
+            self._db.execute("""
+                UPDATE tasks SET status = 'failed', error = 'lease expired', owner = NULL, updated_at = ?
+                WHERE shard = ? AND status = 'leased' AND lease_until < ? AND attempts >= ?
+            """, (now, shard, now, self.max_attempts))
+            rows = self._db.execute("""
+                SELECT id, url FROM tasks
+                WHERE shard = ? AND (status = 'pending' OR (status = 'leased' AND lease_until < ?))
+                ORDER BY id LIMIT ?
+            """, (shard, now, limit)).fetchall()
+            self._db.executemany("""
+                UPDATE tasks SET status = 'leased', owner = ?, lease_until = ?, attempts = attempts + 1,
+                                 updated_at = ?
+                WHERE id = ?
+            """, [(worker, now + duration, now, task_id) for task_id, _ in rows])
+        return rows
+
+    def heartbeat(self, worker: str, duration: float):
+        lease_until = time.time() + duration
+        with self._transaction():
+            self._db.execute("UPDATE tasks SET lease_until = ? WHERE owner = ? AND status = 'leased'",
+                             (lease_until, worker))
+            self._db.execute('UPDATE shards SET lease_until = ? WHERE owner = ?', (lease_until, worker))
+
+    def ack(self, worker: str, task_ids: Iterable[int]) -> int:
+        now = time.time()
+        with self._transaction():
+            before = self._db.total_changes
+            # A worker whose lease expired no longer owns the task and cannot ack it
+            self._db.executemany("""
+                UPDATE tasks SET status = 'done', lease_until = NULL, updated_at = ?
+                WHERE id = ? AND owner = ? AND status = 'leased'
+            """, [(now, task_id, worker) for task_id in task_ids])
+            return self._db.total_changes - before
+
+    def fail(self, worker: str, failures: Iterable[Tuple[int, str]]):
+        now = time.time()
+        with self._transaction():
+            self._db.executemany("""
+                UPDATE tasks SET status = 'failed', error = ?, lease_until = NULL, updated_at = ?
+                WHERE id = ? AND owner = ? AND status = 'leased'
+            """, [(error, now, task_id, worker) for task_id, error in failures])
+
+    def requeue_failed(self) -> int:
+        with self._transaction():
+            before = self._db.total_changes
+            self._db.execute("""
+                UPDATE tasks SET status = 'pending', owner = NULL, lease_until = NULL, attempts = 0,
+                                 error = NULL, updated_at = ?
+                WHERE status = 'failed'
+            """, (time.time(),))
+            return self._db.total_changes - before
+
+    def progress(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+            for status, count in self._db.execute('SELECT status, COUNT(*) FROM tasks GROUP BY status'):
+                counts[status] = count
+            counts['total'] = sum(counts.values())
+            counts['workers'] = dict(self._db.execute(
+                "SELECT owner, COUNT(*) FROM tasks WHERE status = 'done' GROUP BY owner ORDER BY owner"))
+            counts['active_shards'] = self._db.execute(
+                'SELECT COUNT(*) FROM shards WHERE owner IS NOT NULL AND lease_until >= ?', (time.time(),)
+            ).fetchone()[0]
+        return counts
+
+    def close(self):
+        self._db.close()
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT under a thread lock, rolled back on errors"""
+
+    def __init__(self, db: sqlite3.Connection, lock: threading.Lock):
+        self._db = db
+        self._lock = lock
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            self._db.execute('BEGIN IMMEDIATE')
+        except BaseException:
+            self._lock.release()
+            raise
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._db.execute('ROLLBACK' if exc_type else 'COMMIT')
+        finally:
+            self._lock.release()
+
+
+QUEUE_BACKENDS = {'sqlite': SQLiteWorkQueue}
+
+
+def register_backend(scheme: str, backend: type):
+    """Make open_queue() create backend for queue specs starting with scheme://"""
+    QUEUE_BACKENDS[scheme] = backend
+
+
+def open_queue(spec: str, **options) -> WorkQueue:
+    """
+    Open a work queue from a spec such as 'queue.sqlite3' or 'sqlite:///data/queue.sqlite3'
+
+    Args:
+        spec: Path of a SQLite queue, or scheme://location for a registered backend
+        options: Passed on to the backend, e.g. shards and max_attempts
+
+    Raises:
+        ValueError: If the scheme has no registered backend
+    """
+    scheme, separator, location = spec.partition('://')
+    if not separator:
+        return SQLiteWorkQueue(spec, **options)
+    if scheme not in QUEUE_BACKENDS:
+        raise ValueError(f"Unknown work queue backend '{scheme}' (known: {', '.join(sorted(QUEUE_BACKENDS))})")
+    return QUEUE_BACKENDS[scheme](location, **options)